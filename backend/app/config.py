@@ -2,48 +2,83 @@
 Configuration settings for the Travel Assistant backend.
 
 Loads settings from environment variables.
+
+Settings are parsed once per process by get_settings(); module-level names
+such as GEMINI_API_KEY resolve lazily to the cached Settings instance.
 """
 
+import functools
 import os
+from dataclasses import dataclass, fields
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
 
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Immutable snapshot of the environment configuration."""
+
+    # ========================================================================
+    # API Keys
+    # ========================================================================
+
+    GEMINI_API_KEY: str
+    TAVILY_API_KEY: str
+
+    # ========================================================================
+    # Application Settings
+    # ========================================================================
+
+    # Use mock data instead of real travel APIs
+    USE_MOCK: bool
+
+    # Environment (development, production)
+    ENV: str
 
-# ============================================================================
-# API Keys
-# ============================================================================
+    # ========================================================================
+    # Server Configuration
+    # ========================================================================
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
-TAVILY_API_KEY = os.getenv("TAVILY_API_KEY", "")
+    HOST: str
+    PORT: int
 
+    # ========================================================================
+    # Feature Flags
+    # ========================================================================
 
-# ============================================================================
-# Application Settings
-# ============================================================================
+    # Enable streaming for partial results
+    ENABLE_STREAMING: bool
 
-# Use mock data instead of real travel APIs
-USE_MOCK = os.getenv("MOCK_DATA", "true").lower() == "true"
+    # Enable interruption handling
+    ENABLE_INTERRUPTION: bool
 
-# Environment (development, production)
-ENV = os.getenv("ENV", "development")
+    # Directory for metadata-only session checkpoints (empty = disabled)
+    CHECKPOINT_DIR: str
 
 
-# ============================================================================
-# Server Configuration
-# ============================================================================
+@functools.cache
+def get_settings() -> Settings:
+    """Load .env (once) and build the process-wide Settings."""
+    # Load environment variables from .env file
+    load_dotenv()
 
-HOST = os.getenv("HOST", "127.0.0.1")
-PORT = int(os.getenv("PORT", "8000"))
+    return Settings(
+        GEMINI_API_KEY=os.getenv("GEMINI_API_KEY", ""),
+        TAVILY_API_KEY=os.getenv("TAVILY_API_KEY", ""),
+        USE_MOCK=os.getenv("MOCK_DATA", "true").lower() == "true",
+        ENV=os.getenv("ENV", "development"),
+        HOST=os.getenv("HOST", "127.0.0.1"),
+        PORT=int(os.getenv("PORT", "8000")),
+        ENABLE_STREAMING=os.getenv("ENABLE_STREAMING", "true").lower() == "true",
+        ENABLE_INTERRUPTION=os.getenv("ENABLE_INTERRUPTION", "true").lower() == "true",
+        CHECKPOINT_DIR=os.getenv("CHECKPOINT_DIR", ""),
+    )
 
 
-# ============================================================================
-# Feature Flags
-# ============================================================================
+_SETTING_NAMES = frozenset(f.name for f in fields(Settings))
 
-# Enable streaming for partial results
-ENABLE_STREAMING = os.getenv("ENABLE_STREAMING", "true").lower() == "true"
 
-# Enable interruption handling
-ENABLE_INTERRUPTION = os.getenv("ENABLE_INTERRUPTION", "true").lower() == "true"
+def __getattr__(name: str):
+    """Expose settings as module attributes (e.g. `from .config import USE_MOCK`)."""
+    if name in _SETTING_NAMES:
+        return getattr(get_settings(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
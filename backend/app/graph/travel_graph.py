@@ -5,17 +5,176 @@ This module defines the agent graph with:
 - Coordinator node (intent routing)
 - Flight Agent node (flight search)
 - Hotel Agent node (hotel search)
+- Combined Agent node (parallel flight + hotel search)
 - Response node (natural language generation)
 """
 
 import asyncio
-from typing import Literal
+import logging
+import re
+import time
+from typing import Any, Dict, List, Literal, Optional
 from langgraph.graph import StateGraph, END
-from ..models import SharedState, Intent, AgentType, FlightSearchParams, HotelSearchParams
-from ..tools import lookup_flights, lookup_hotels
+from ..models import (
+    SharedState,
+    Intent,
+    AgentType,
+    ConversationTurn,
+    FlightSearchParams,
+    HotelSearchParams,
+    FlightResult,
+    HotelResult,
+    FlightResultListAdapter,
+    HotelResultListAdapter,
+)
+from ..tools import combined_search, lookup_flights_async, lookup_hotels_async
 from ..config import USE_MOCK
-from ..llm import classify_intent, generate_response_summary
+from ..llm import (
+    INTENT_HISTORY_TURNS,
+    classify_intent_cached,
+    is_affirmative,
+    generate_response_summary,
+    generate_response_stream_async,
+)
 from ..services.event_manager import event_manager
+from ..services.summarization import append_turn
+from ..services.preferences import (
+    extract_preferences,
+    apply_preferences_to_flight_params,
+    apply_preferences_to_hotel_params,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# Token streaming: flush after this many tokens or this many seconds
+TOKEN_BATCH_SIZE = 8
+TOKEN_FLUSH_INTERVAL = 0.02
+
+
+# ============================================================================
+# Helpers
+# ============================================================================
+
+_GREETING_RE = re.compile(r"^\s*(hi|hello|hey|good (morning|afternoon|evening))\b", re.IGNORECASE)
+_THANKS_RE = re.compile(r"\b(thanks|thank you|thx|cheers)\b", re.IGNORECASE)
+
+GREETING_REPLY = "Hi there! I can help you find flights and hotels. Where would you like to go?"
+THANKS_REPLY = "You're welcome! Let me know if you'd like to search for more flights or hotels."
+DEFAULT_REPLY = "I'm ready to help you search for flights and hotels. What are you looking for?"
+
+
+def _templated_reply(user_message: str) -> str:
+    """Canned reply for turns with no travel intent and nothing to summarize."""
+    if _GREETING_RE.search(user_message):
+        return GREETING_REPLY
+    if _THANKS_RE.search(user_message):
+        return THANKS_REPLY
+    return DEFAULT_REPLY
+
+
+def _pending_confirmation(state: SharedState, user_message: str) -> Optional[Dict[str, Any]]:
+    """
+    Resolve a bare confirmation ("yes", "book it") without the LLM.
+    
+    Only applies when exactly one booking is pending, so the confirmation
+    is unambiguous. Returns the same shape classify_intent produces for
+    confirmations, or None to fall through to classification.
+    """
+    if not is_affirmative(user_message):
+        return None
+    
+    if state.pending_flight_booking and not state.pending_hotel_booking:
+        item_type = "flight"
+    elif state.pending_hotel_booking and not state.pending_flight_booking:
+        item_type = "hotel"
+    else:
+        return None
+    
+    return {
+        "intent": "other",
+        "selected_item": {"type": item_type, "identifier": "confirmed", "action": "book"}
+    }
+
+
+def _same_booking(pending: Optional[str], identifier: Optional[str]) -> bool:
+    """
+    Check whether a new selection refers to the pending booking.
+    
+    Normalizes both sides once, then matches on equality or containment in
+    either direction (e.g. "JetBlue" vs "I'll take the JetBlue flight").
+    """
+    if not pending or not identifier:
+        return False
+    pending_norm = pending.lower().strip()
+    identifier_norm = identifier.lower().strip()
+    if not pending_norm or not identifier_norm:
+        return False
+    return (
+        pending_norm == identifier_norm
+        or identifier_norm in pending_norm
+        or pending_norm in identifier_norm
+    )
+
+
+def _prime_json(results: list) -> list:
+    """Serialize each result once here so the broadcast path only splices cached bytes."""
+    for r in results:
+        r.dumped_json()
+    return results
+
+
+def _to_flight_results(results: list) -> List[FlightResult]:
+    """Validate a list of flight dicts (or passthrough FlightResult objects) in one batch."""
+    if all(isinstance(r, dict) for r in results):
+        return _prime_json(FlightResultListAdapter.validate_python(results))
+    already = [r for r in results if not isinstance(r, dict)]
+    raw = [r for r in results if isinstance(r, dict)]
+    return _prime_json(already + FlightResultListAdapter.validate_python(raw))
+
+
+def _to_hotel_results(results: list) -> List[HotelResult]:
+    """Validate a list of hotel dicts (or passthrough HotelResult objects) in one batch."""
+    if all(isinstance(r, dict) for r in results):
+        return _prime_json(HotelResultListAdapter.validate_python(results))
+    already = [r for r in results if not isinstance(r, dict)]
+    raw = [r for r in results if isinstance(r, dict)]
+    return _prime_json(already + HotelResultListAdapter.validate_python(raw))
+
+
+def _index_by_id(results: list) -> Dict[str, int]:
+    """Map each result id to its position in the results list."""
+    return {r.id: i for i, r in enumerate(results)}
+
+
+def _results_stale(existing: list, key_attr: str, new_key: Optional[str]) -> bool:
+    """True when there are no results yet or they were fetched for a different key."""
+    return not existing or getattr(existing[0], key_attr) != new_key
+
+
+def _dump_flight_results(state: SharedState) -> Optional[List[Dict[str, Any]]]:
+    """Return JSON-ready flight dicts, re-dumping only when the results version changed."""
+    if not state.flight_results:
+        return None
+    if state.flight_results_dump is None or state.flight_results_dump_version != state.flight_results_version:
+        state.flight_results_dump = FlightResultListAdapter.dump_python(
+            state.flight_results, mode="json", exclude_none=True
+        )
+        state.flight_results_dump_version = state.flight_results_version
+    return state.flight_results_dump
+
+
+def _dump_hotel_results(state: SharedState) -> Optional[List[Dict[str, Any]]]:
+    """Return JSON-ready hotel dicts, re-dumping only when the results version changed."""
+    if not state.hotel_results:
+        return None
+    if state.hotel_results_dump is None or state.hotel_results_dump_version != state.hotel_results_version:
+        state.hotel_results_dump = HotelResultListAdapter.dump_python(
+            state.hotel_results, mode="json", exclude_none=True
+        )
+        state.hotel_results_dump_version = state.hotel_results_version
+    return state.hotel_results_dump
 
 
 # ============================================================================
@@ -35,7 +194,7 @@ async def coordinator_node(state: SharedState) -> SharedState:
     
     Uses Gemini LLM for intent classification and parameter extraction.
     """
-    print(f"[Coordinator] Processing intent...")
+    logger.debug("[Coordinator] Processing intent...")
     if state.session_id:
         await event_manager.emit(state.session_id, "agent_status", {
             "agent": "Coordinator",
@@ -45,23 +204,19 @@ async def coordinator_node(state: SharedState) -> SharedState:
     
     # Check for interruption
     if state.is_interrupted:
-        print(f"[Coordinator] Run interrupted, skipping")
+        logger.debug("[Coordinator] Run interrupted, skipping")
         return state
     
-    # Get latest user message
-    last_message = ""
-    if state.conversation_history:
-        user_messages = [t for t in state.conversation_history if t.sender == "user"]
-        if user_messages:
-            last_message = user_messages[-1].text
+    # Get latest user message (maintained on ingress)
+    last_message = state.last_user_message or ""
     
-    # Extract preferences from user message
-    from ..services.preferences import extract_preferences, apply_preferences_to_flight_params, apply_preferences_to_hotel_params
-    if last_message:
+    # Extract preferences from user message (once per user turn)
+    if last_message and state.preferences_turn != state.user_turn_count:
+        state.preferences_turn = state.user_turn_count
         state.user_preferences = extract_preferences(last_message, state.user_preferences)
-        if state.user_preferences.preference_items:
+        if state.user_preferences.newly_added:
             latest_pref = state.user_preferences.preference_items[-1]
-            print(f"[Coordinator] Learned preference: {latest_pref.category}={latest_pref.value}")
+            logger.debug("[Coordinator] Learned preference: %s=%s", latest_pref.category, latest_pref.value)
             if state.session_id:
                 await event_manager.emit(state.session_id, "agent_status", {
                     "agent": "Coordinator",
@@ -69,14 +224,21 @@ async def coordinator_node(state: SharedState) -> SharedState:
                     "step": "preference_learning"
                 })
     
-    # Convert conversation history to dict format for LLM
+    # Convert conversation history to dict format for LLM (only the turns it reads)
     history_dict = [
         {"sender": turn.sender, "text": turn.text}
-        for turn in state.conversation_history[-5:]  # Last 5 turns
+        for turn in state.conversation_history[-INTENT_HISTORY_TURNS:]
     ]
     
-    # Use Gemini to classify intent and extract parameters
-    intent_result = classify_intent(last_message, history_dict)
+    # Bare confirmations of a single pending booking skip classification entirely;
+    # otherwise use Gemini to classify intent and extract parameters (cached per message + history)
+    intent_result = _pending_confirmation(state, last_message)
+    if intent_result is None:
+        intent_result = classify_intent_cached(
+            last_message,
+            history_dict,
+            has_flight_context=state.flight_params is not None
+        )
     
     # Update intent
     intent_str = intent_result.get("intent", "other")
@@ -97,7 +259,7 @@ async def coordinator_node(state: SharedState) -> SharedState:
             cabin_class=fp.get("cabin_class", "economy"),
             max_stops=fp.get("max_stops")
         )
-        print(f"[Coordinator] Extracted flight params: origin={state.flight_params.origin}, dest={state.flight_params.destination}, max_stops={state.flight_params.max_stops}")
+        logger.debug("[Coordinator] Extracted flight params: origin=%s, dest=%s, max_stops=%s", state.flight_params.origin, state.flight_params.destination, state.flight_params.max_stops)
     
     # Extract hotel parameters if present
     if "hotel_params" in intent_result and intent_result["hotel_params"]:
@@ -120,23 +282,27 @@ async def coordinator_node(state: SharedState) -> SharedState:
     # Clear stale results based on intent to prevent "ghost" results
     # BUT preserve selected/pending items so we don't lose context
     if state.current_intent == Intent.FLIGHT:
-        print("[Coordinator] Intent is FLIGHT, clearing hotel results (keeping selection if any)")
+        logger.debug("[Coordinator] Intent is FLIGHT, clearing hotel results (keeping selection if any)")
         # Only clear the list of results to clean up UI
         # But keep the selected_hotel_id so we remember what they picked
-        state.hotel_results = [] 
+        state.hotel_results = []
+        state.hotel_index = {}
         # Do NOT clear selected_hotel_id or pending_hotel_booking
         
     elif state.current_intent == Intent.HOTEL:
-        print("[Coordinator] Intent is HOTEL, clearing flight results (keeping selection if any)")
+        logger.debug("[Coordinator] Intent is HOTEL, clearing flight results (keeping selection if any)")
         state.flight_results = []
+        state.flight_index = {}
         # Do NOT clear selected_flight_id or pending_flight_booking
         
     elif state.current_intent == Intent.COMBINED:
-        print("[Coordinator] Intent is COMBINED, clearing all previous results")
+        logger.debug("[Coordinator] Intent is COMBINED, clearing all previous results")
         # For combined, we usually start fresh, but maybe we should keep selections?
         # Let's keep selections just in case
         state.flight_results = []
         state.hotel_results = []
+        state.flight_index = {}
+        state.hotel_index = {}
     
     # Handle selected items (for booking/selection)
     if "selected_item" in intent_result and intent_result["selected_item"]:
@@ -147,19 +313,14 @@ async def coordinator_node(state: SharedState) -> SharedState:
         if selected.get("type") == "flight":
             if action == "select":
                 # Check if user is re-selecting the same pending flight (treat as confirmation)
-                # Check both directions for substring matching to be more robust
-                is_same_flight = False
+                is_same_flight = _same_booking(state.pending_flight_booking, identifier)
                 if state.pending_flight_booking and identifier:
-                    pending_lower = state.pending_flight_booking.lower()
-                    identifier_lower = identifier.lower()
-                    # Check if either is a substring of the other
-                    is_same_flight = (identifier_lower in pending_lower) or (pending_lower in identifier_lower)
-                    print(f"[Coordinator] Checking flight match: pending='{state.pending_flight_booking}', new='{identifier}', match={is_same_flight}")
+                    logger.debug("[Coordinator] Checking flight match: pending='%s', new='%s', match=%s", state.pending_flight_booking, identifier, is_same_flight)
                 
                 if is_same_flight:
                     # User clicked the same option again - treat as confirmation
                     state.selected_flight_id = state.pending_flight_booking
-                    print(f"[Coordinator] User re-selected pending flight (treating as confirmation): {state.pending_flight_booking}")
+                    logger.debug("[Coordinator] User re-selected pending flight (treating as confirmation): %s", state.pending_flight_booking)
                     state.pending_flight_booking = None  # Clear pending
                     
                     # Find and store the full flight object
@@ -169,13 +330,13 @@ async def coordinator_node(state: SharedState) -> SharedState:
                                 state.selected_flight_id.lower() in (flight.flight_number or "").lower() or
                                 str(flight.price) in state.selected_flight_id):
                                 state.selected_flight = flight
-                                print(f"[Coordinator] Stored full flight object: {flight.airline} {flight.flight_number}")
+                                logger.debug("[Coordinator] Stored full flight object: %s %s", flight.airline, flight.flight_number)
                                 break
                 else:
                     # User is making a new selection - mark as pending booking
                     state.selected_flight_id = identifier
                     state.pending_flight_booking = identifier
-                    print(f"[Coordinator] User selecting flight: {identifier} (pending confirmation)")
+                    logger.debug("[Coordinator] User selecting flight: %s (pending confirmation)", identifier)
                     
                     # Find and store the full flight object
                     if state.flight_results:
@@ -184,13 +345,13 @@ async def coordinator_node(state: SharedState) -> SharedState:
                                 identifier.lower() in (flight.flight_number or "").lower() or
                                 str(flight.price) in identifier):
                                 state.selected_flight = flight
-                                print(f"[Coordinator] Stored full flight object: {flight.airline} {flight.flight_number}")
+                                logger.debug("[Coordinator] Stored full flight object: %s %s", flight.airline, flight.flight_number)
                                 break
             elif action == "book" or identifier == "confirmed":
                 # User is confirming - complete the booking
                 if state.pending_flight_booking:
                     state.selected_flight_id = state.pending_flight_booking
-                    print(f"[Coordinator] User confirmed flight booking: {state.pending_flight_booking}")
+                    logger.debug("[Coordinator] User confirmed flight booking: %s", state.pending_flight_booking)
                     state.pending_flight_booking = None  # Clear pending
                     
                     # Find and store the full flight object if not already stored
@@ -200,43 +361,38 @@ async def coordinator_node(state: SharedState) -> SharedState:
                                 state.selected_flight_id.lower() in (flight.flight_number or "").lower() or
                                 str(flight.price) in state.selected_flight_id):
                                 state.selected_flight = flight
-                                print(f"[Coordinator] Stored full flight object: {flight.airline} {flight.flight_number}")
+                                logger.debug("[Coordinator] Stored full flight object: %s %s", flight.airline, flight.flight_number)
                                 break
                 else:
-                    print(f"[Coordinator] User confirming booking (no pending flight)")
+                    logger.debug("[Coordinator] User confirming booking (no pending flight)")
         elif selected.get("type") == "hotel":
             if action == "select":
                 # Check if user is re-selecting the same pending hotel (treat as confirmation)
-                # Check both directions for substring matching to be more robust
-                is_same_hotel = False
+                is_same_hotel = _same_booking(state.pending_hotel_booking, identifier)
                 if state.pending_hotel_booking and identifier:
-                    pending_lower = state.pending_hotel_booking.lower()
-                    identifier_lower = identifier.lower()
-                    # Check if either is a substring of the other
-                    is_same_hotel = (identifier_lower in pending_lower) or (pending_lower in identifier_lower)
-                    print(f"[Coordinator] Checking hotel match: pending='{state.pending_hotel_booking}', new='{identifier}', match={is_same_hotel}")
+                    logger.debug("[Coordinator] Checking hotel match: pending='%s', new='%s', match=%s", state.pending_hotel_booking, identifier, is_same_hotel)
                 
                 if is_same_hotel:
                     # User clicked the same option again - treat as confirmation
                     state.selected_hotel_id = state.pending_hotel_booking
-                    print(f"[Coordinator] User re-selected pending hotel (treating as confirmation): {state.pending_hotel_booking}")
+                    logger.debug("[Coordinator] User re-selected pending hotel (treating as confirmation): %s", state.pending_hotel_booking)
                     state.pending_hotel_booking = None  # Clear pending
                 else:
                     # User is making a new selection - mark as pending booking
                     state.selected_hotel_id = identifier
                     state.pending_hotel_booking = identifier
-                    print(f"[Coordinator] User selecting hotel: {identifier} (pending confirmation)")
+                    logger.debug("[Coordinator] User selecting hotel: %s (pending confirmation)", identifier)
             elif action == "book" or identifier == "confirmed":
                 if state.pending_hotel_booking:
                     state.selected_hotel_id = state.pending_hotel_booking
-                    print(f"[Coordinator] User confirmed hotel booking: {state.pending_hotel_booking}")
+                    logger.debug("[Coordinator] User confirmed hotel booking: %s", state.pending_hotel_booking)
                     state.pending_hotel_booking = None
                 else:
-                    print(f"[Coordinator] User confirming booking (no pending hotel)")
+                    logger.debug("[Coordinator] User confirming booking (no pending hotel)")
     
     state.last_agent = AgentType.COORDINATOR
     
-    print(f"[Coordinator] Detected intent: {state.current_intent}")
+    logger.debug("[Coordinator] Detected intent: %s", state.current_intent)
     if state.session_id:
         await event_manager.emit(state.session_id, "agent_status", {
             "agent": "Coordinator",
@@ -245,9 +401,9 @@ async def coordinator_node(state: SharedState) -> SharedState:
         })
 
     if state.flight_params:
-        print(f"[Coordinator] Flight params: {state.flight_params.origin} → {state.flight_params.destination}")
+        logger.debug("[Coordinator] Flight params: %s → %s", state.flight_params.origin, state.flight_params.destination)
     if state.hotel_params:
-        print(f"[Coordinator] Hotel params: {state.hotel_params.city}")
+        logger.debug("[Coordinator] Hotel params: %s", state.hotel_params.city)
     
     return state
 
@@ -262,7 +418,7 @@ async def flight_agent_node(state: SharedState) -> SharedState:
     - Append results to state.flight_results
     - Support partial results streaming
     """
-    print(f"[Flight Agent] Searching flights...")
+    logger.debug("[Flight Agent] Searching flights...")
     if state.session_id:
         await event_manager.emit(state.session_id, "agent_status", {
             "agent": "Flight Agent",
@@ -272,7 +428,7 @@ async def flight_agent_node(state: SharedState) -> SharedState:
     
     # Check for interruption
     if state.is_interrupted:
-        print(f"[Flight Agent] Run interrupted, skipping search")
+        logger.debug("[Flight Agent] Run interrupted, skipping search")
         return state
     
     # Use flight_params from state or create defaults
@@ -293,17 +449,9 @@ async def flight_agent_node(state: SharedState) -> SharedState:
     
     # Only search for NEW flights if we don't have results already
     # or if the search parameters have changed significantly
-    should_search = (
-        len(state.flight_results) == 0 or 
-        (state.flight_params and len(state.flight_results) > 0 and 
-         state.flight_results[0].destination != state.flight_params.destination)
-    )
+    should_search = _results_stale(state.flight_results, "destination", state.flight_params.destination)
     
     if should_search:
-        # Use async streaming search with partial results support
-        from ..tools import lookup_flights
-        import asyncio # Import asyncio for sleep
-        
         # Prepare flight parameters for the search
         flight_params = state.flight_params
         
@@ -315,8 +463,7 @@ async def flight_agent_node(state: SharedState) -> SharedState:
                 "step": "search_executing"
             })
 
-        search_result = await asyncio.to_thread(
-            lookup_flights,
+        search_result = await lookup_flights_async(
             origin=flight_params.origin or "JFK",
             destination=flight_params.destination or "LAX",
             depart_date=flight_params.depart_date,
@@ -337,13 +484,11 @@ async def flight_agent_node(state: SharedState) -> SharedState:
             await asyncio.sleep(0.5)
         
         # Convert dict results to FlightResult objects
-        from ..models import FlightResult
-        state.flight_results = [
-            FlightResult(**flight) if isinstance(flight, dict) else flight
-            for flight in search_result["results"]
-        ]
+        state.flight_results = _to_flight_results(search_result["results"])
+        state.flight_index = _index_by_id(state.flight_results)
+        state.flight_results_version += 1
         
-        print(f"[Flight Agent] Found {len(state.flight_results)} flights (source: {search_result['source']})")
+        logger.debug("[Flight Agent] Found %s flights (source: %s)", len(state.flight_results), search_result['source'])
         if state.session_id:
             await event_manager.emit(state.session_id, "agent_status", {
                 "agent": "Flight Agent",
@@ -351,7 +496,7 @@ async def flight_agent_node(state: SharedState) -> SharedState:
                 "step": "search_complete"
             })
     else:
-        print(f"[Flight Agent] Reusing existing {len(state.flight_results)} flights")
+        logger.debug("[Flight Agent] Reusing existing %s flights", len(state.flight_results))
     
     state.last_agent = AgentType.FLIGHT
     
@@ -368,7 +513,7 @@ async def hotel_agent_node(state: SharedState) -> SharedState:
     - Append results to state.hotel_results
     - Support partial results streaming
     """
-    print(f"[Hotel Agent] Searching hotels...")
+    logger.debug("[Hotel Agent] Searching hotels...")
     if state.session_id:
         await event_manager.emit(state.session_id, "agent_status", {
             "agent": "Hotel Agent",
@@ -378,7 +523,7 @@ async def hotel_agent_node(state: SharedState) -> SharedState:
     
     # Check for interruption
     if state.is_interrupted:
-        print(f"[Hotel Agent] Run interrupted, skipping search")
+        logger.debug("[Hotel Agent] Run interrupted, skipping search")
         return state
     
     # Derive hotel params from flight destination if not set
@@ -399,19 +544,11 @@ async def hotel_agent_node(state: SharedState) -> SharedState:
     
     # Only search for NEW hotels if we don't have results already
     # or if the search parameters have changed
-    should_search = (
-        len(state.hotel_results) == 0 or 
-        (state.hotel_params and len(state.hotel_results) > 0 and 
-         state.hotel_results[0].city != state.hotel_params.city)
-    )
+    should_search = _results_stale(state.hotel_results, "city", state.hotel_params.city)
     
     if should_search:
-        # Use async streaming search with partial results support
-        from ..travel.mock_hotels import search_hotels_streaming
-        
         # Run search (supports cancellation via asyncio)
-        search_result = await asyncio.to_thread(
-            lookup_hotels,
+        search_result = await lookup_hotels_async(
             city=state.hotel_params.city or "Los Angeles",
             check_in=state.hotel_params.check_in,
             check_out=state.hotel_params.check_out,
@@ -421,13 +558,11 @@ async def hotel_agent_node(state: SharedState) -> SharedState:
         )
         
         # Convert dict results to HotelResult objects
-        from ..models import HotelResult
-        state.hotel_results = [
-            HotelResult(**hotel) if isinstance(hotel, dict) else hotel
-            for hotel in search_result["results"]
-        ]
+        state.hotel_results = _to_hotel_results(search_result["results"])
+        state.hotel_index = _index_by_id(state.hotel_results)
+        state.hotel_results_version += 1
         
-        print(f"[Hotel Agent] Found {len(state.hotel_results)} hotels (source: {search_result['source']})")
+        logger.debug("[Hotel Agent] Found %s hotels (source: %s)", len(state.hotel_results), search_result['source'])
         if state.session_id:
             await event_manager.emit(state.session_id, "agent_status", {
                 "agent": "Hotel Agent",
@@ -435,10 +570,127 @@ async def hotel_agent_node(state: SharedState) -> SharedState:
                 "step": "search_complete"
             })
     else:
-        print(f"[Hotel Agent] Reusing existing {len(state.hotel_results)} hotels")
+        logger.debug("[Hotel Agent] Reusing existing %s hotels", len(state.hotel_results))
     
     state.last_agent = AgentType.HOTEL
-    
+
+    return state
+
+
+async def combined_agent_node(state: SharedState) -> SharedState:
+    """
+    Combined Agent: Searches flights and hotels concurrently.
+
+    Responsibilities:
+    - Resolve flight_params and derive hotel_params up front
+    - Run the stale lookups (in parallel via tools.combined_search when
+      both are stale)
+    - Store the refreshed result lists on the state
+
+    LangGraph only parallelizes at the graph level, so the fan-out for
+    COMBINED intent happens explicitly inside this node.
+    """
+    logger.debug("[Combined Agent] Searching flights and hotels...")
+    if state.session_id:
+        await event_manager.emit(state.session_id, "agent_status", {
+            "agent": "Combined Agent",
+            "status": "Searching flights and hotels in parallel...",
+            "step": "search_start"
+        })
+
+    # Check for interruption
+    if state.is_interrupted:
+        logger.debug("[Combined Agent] Run interrupted, skipping search")
+        return state
+
+    # Same defaults as flight_agent_node
+    if state.flight_params is None:
+        state.flight_params = FlightSearchParams(
+            origin="JFK",
+            destination="LAX",
+            passengers=1
+        )
+
+    if not state.flight_params.origin:
+        if state.flight_params.destination and state.flight_params.destination.upper() == "JFK":
+             state.flight_params.origin = "LHR" # Default to London if going to NYC
+        else:
+             state.flight_params.origin = "JFK" # Default to NYC otherwise
+
+    # Same derivation as hotel_agent_node, done before the fan-out
+    if state.hotel_params is None:
+        if state.flight_params.destination:
+            state.hotel_params = HotelSearchParams(
+                city=state.flight_params.destination,
+                check_in=state.flight_params.depart_date,
+                check_out=state.flight_params.return_date,
+                guests=state.flight_params.passengers
+            )
+        else:
+            state.hotel_params = HotelSearchParams(
+                city="Los Angeles",
+                guests=1
+            )
+
+    flight_params = state.flight_params
+    hotel_params = state.hotel_params
+
+    # Same staleness checks as the single-agent nodes: only re-run the
+    # lookups whose key changed, so unchanged results keep their ids
+    flight_stale = _results_stale(state.flight_results, "destination", flight_params.destination)
+    hotel_stale = _results_stale(state.hotel_results, "city", hotel_params.city)
+
+    flight_kwargs = dict(
+        origin=flight_params.origin or "JFK",
+        destination=flight_params.destination or "LAX",
+        depart_date=flight_params.depart_date,
+        return_date=flight_params.return_date,
+        passengers=flight_params.passengers or 1,
+        cabin_class=flight_params.cabin_class or "economy",
+        max_stops=flight_params.max_stops
+    )
+    hotel_kwargs = dict(
+        city=hotel_params.city or "Los Angeles",
+        check_in=hotel_params.check_in,
+        check_out=hotel_params.check_out,
+        guests=hotel_params.guests or 1,
+        budget=hotel_params.budget,
+        min_rating=hotel_params.min_rating
+    )
+
+    flight_search = hotel_search = None
+    if flight_stale and hotel_stale:
+        flight_search, hotel_search = await combined_search(flight_kwargs, hotel_kwargs)
+    elif flight_stale:
+        flight_search = await lookup_flights_async(**flight_kwargs)
+    elif hotel_stale:
+        hotel_search = await lookup_hotels_async(**hotel_kwargs)
+
+    if flight_search is not None:
+        state.flight_results = _to_flight_results(flight_search["results"])
+        state.flight_index = _index_by_id(state.flight_results)
+        state.flight_results_version += 1
+        logger.debug("[Combined Agent] Found %s flights (source: %s)", len(state.flight_results), flight_search["source"])
+    else:
+        logger.debug("[Combined Agent] Reusing existing %s flights", len(state.flight_results))
+
+    if hotel_search is not None:
+        state.hotel_results = _to_hotel_results(hotel_search["results"])
+        state.hotel_index = _index_by_id(state.hotel_results)
+        state.hotel_results_version += 1
+        logger.debug("[Combined Agent] Found %s hotels (source: %s)", len(state.hotel_results), hotel_search["source"])
+    else:
+        logger.debug("[Combined Agent] Reusing existing %s hotels", len(state.hotel_results))
+
+    if state.session_id:
+        await event_manager.emit(state.session_id, "agent_status", {
+            "agent": "Combined Agent",
+            "status": f"Found {len(state.flight_results)} flights and {len(state.hotel_results)} hotels",
+            "step": "search_complete"
+        })
+
+    state.last_agent = AgentType.HOTEL
+
     return state
 
 
@@ -453,7 +705,7 @@ async def response_node(state: SharedState) -> SharedState:
     
     Uses Gemini for natural language generation.
     """
-    print(f"[Response] Generating response...")
+    logger.debug("[Response] Generating response...")
     if state.session_id:
         await event_manager.emit(state.session_id, "agent_status", {
             "agent": "Responder",
@@ -463,19 +715,26 @@ async def response_node(state: SharedState) -> SharedState:
     
     # Check for interruption
     if state.is_interrupted:
-        print(f"[Response] Run interrupted, skipping response generation")
+        logger.debug("[Response] Run interrupted, skipping response generation")
         return state
     
-    # Get latest user message for context
-    user_message = ""
-    if state.conversation_history:
-        user_messages = [t for t in state.conversation_history if t.sender == "user"]
-        if user_messages:
-            user_message = user_messages[-1].text
+    # Get latest user message for context (maintained on ingress)
+    user_message = state.last_user_message or ""
     
-    # Convert results to dict format
-    flight_results_dict = [f.dict() for f in state.flight_results] if state.flight_results else None
-    hotel_results_dict = [h.dict() for h in state.hotel_results] if state.hotel_results else None
+    # Nothing to summarize and nothing selected: answer from a template, skip the LLM
+    if (state.current_intent == Intent.OTHER
+            and not state.flight_results and not state.hotel_results
+            and not (state.selected_flight_id or state.selected_hotel_id)):
+        response_text = _templated_reply(user_message)
+        if state.session_id:
+            await event_manager.emit(state.session_id, "response_complete", {
+                "text": response_text
+            })
+        return await _finish_response(state, response_text)
+    
+    # Convert results to dict format (cached on state per results version)
+    flight_results_dict = _dump_flight_results(state)
+    hotel_results_dict = _dump_hotel_results(state)
     
     # Build context for response including selections and validation
     context_info = {
@@ -508,62 +767,78 @@ async def response_node(state: SharedState) -> SharedState:
     if state.selected_flight_id:
         if state.selected_flight:
             # Use the stored object
-            context_info["matching_flights"] = [state.selected_flight.dict()]
-            print(f"[Response] Using stored flight object: {state.selected_flight.airline}")
+            context_info["matching_flights"] = [state.selected_flight.model_dump(mode="json", exclude_none=True)]
+            logger.debug("[Response] Using stored flight object: %s", state.selected_flight.airline)
         elif state.flight_results:
             # Fall back to searching in current results
             selected_identifier = state.selected_flight_id.lower()
-            matching_flights = [
-                f for f in state.flight_results 
-                if (selected_identifier in f.airline.lower() or 
-                    selected_identifier in f.flight_number.lower() if f.flight_number else False or
-                    str(f.price) in selected_identifier)
-            ]
-            context_info["matching_flights"] = [f.dict() for f in matching_flights] if matching_flights else None
+            matching_flights = []
+            for f, dumped in zip(state.flight_results, flight_results_dict):
+                if (selected_identifier in f.airline.lower()
+                        or (f.flight_number and selected_identifier in f.flight_number.lower())
+                        or str(f.price) in selected_identifier):
+                    matching_flights.append(dumped)
+            context_info["matching_flights"] = matching_flights or None
     
     # If user selected a hotel, provide the details
     if state.selected_hotel_id:
         if state.selected_hotel:
             # Use the stored object
-            context_info["matching_hotels"] = [state.selected_hotel.dict()]
-            print(f"[Response] Using stored hotel object: {state.selected_hotel.name}")
+            context_info["matching_hotels"] = [state.selected_hotel.model_dump(mode="json", exclude_none=True)]
+            logger.debug("[Response] Using stored hotel object: %s", state.selected_hotel.name)
         elif state.hotel_results:
             # Fall back to searching in current results
             selected_identifier = state.selected_hotel_id.lower()
-            matching_hotels = [
-                h for h in state.hotel_results 
-                if (selected_identifier in h.name.lower() or 
-                    str(h.price_per_night) in selected_identifier)
-            ]
-            context_info["matching_hotels"] = [h.dict() for h in matching_hotels] if matching_hotels else None
+            matching_hotels = []
+            for h, dumped in zip(state.hotel_results, hotel_results_dict):
+                if (selected_identifier in h.name.lower()
+                        or str(h.price_per_night) in selected_identifier):
+                    matching_hotels.append(dumped)
+            context_info["matching_hotels"] = matching_hotels or None
     
     # Generate response using Gemini (Streaming)
-    from ..llm import generate_response_stream
-    
     response_text = ""
     
     # Stream tokens if session_id is available
     if state.session_id:
         try:
-            for token in generate_response_stream(
+            loop = asyncio.get_running_loop()
+            chunks = []
+            pending = []
+            last_flush = loop.time()
+            
+            async for token in generate_response_stream_async(
                 intent=state.current_intent.value,
                 flight_results=flight_results_dict,
                 hotel_results=hotel_results_dict,
                 user_message=user_message,
                 context=context_info
             ):
-                response_text += token
-                # Emit token event
-                # We use a fire-and-forget approach or await if we can
-                # Since this is an async node, we can await
+                chunks.append(token)
+                pending.append(token)
+                # Batch tokens so we emit once per window instead of per token;
+                # the client concatenates deltas itself
+                if len(pending) >= TOKEN_BATCH_SIZE or loop.time() - last_flush > TOKEN_FLUSH_INTERVAL:
+                    await event_manager.emit(state.session_id, "token", {
+                        "delta": "".join(pending)
+                    })
+                    pending.clear()
+                    last_flush = loop.time()
+            
+            if pending:
                 await event_manager.emit(state.session_id, "token", {
-                    "text": token,
-                    "full_text": response_text  # Optional: send full text so far for easier UI handling
+                    "delta": "".join(pending)
                 })
+            
+            response_text = "".join(chunks)
+            await event_manager.emit(state.session_id, "response_complete", {
+                "text": response_text
+            })
         except Exception as e:
-            print(f"[Response] Error streaming: {e}")
-            # Fallback to non-streaming if streaming fails
-            response_text = generate_response_summary(
+            logger.warning("[Response] Error streaming: %s", e)
+            # Fallback to non-streaming if streaming fails (off the event loop)
+            response_text = await asyncio.to_thread(
+                generate_response_summary,
                 intent=state.current_intent.value,
                 flight_results=flight_results_dict,
                 hotel_results=hotel_results_dict,
@@ -571,8 +846,9 @@ async def response_node(state: SharedState) -> SharedState:
                 context=context_info
             )
     else:
-        # Non-streaming fallback
-        response_text = generate_response_summary(
+        # Non-streaming fallback (blocking Gemini call, so run it in a worker thread)
+        response_text = await asyncio.to_thread(
+            generate_response_summary,
             intent=state.current_intent.value,
             flight_results=flight_results_dict,
             hotel_results=hotel_results_dict,
@@ -580,18 +856,21 @@ async def response_node(state: SharedState) -> SharedState:
             context=context_info
         )
     
-    # Add to conversation history
-    from ..models import ConversationTurn
-    import time
-    
-    assistant_turn = ConversationTurn(
+    return await _finish_response(state, response_text)
+
+
+async def _finish_response(state: SharedState, response_text: str) -> SharedState:
+    """Append the assistant turn to history and report completion."""
+    # Add to conversation history (values are ours, so skip validation)
+    assistant_turn = ConversationTurn.model_construct(
         sender="assistant",
         text=response_text,
-        timestamp=time.time()
+        timestamp=time.time(),
+        mono_ns=time.monotonic_ns()
     )
-    state.conversation_history.append(assistant_turn)
+    append_turn(state, assistant_turn)
     
-    print(f"[Response] Generated: {response_text}")
+    logger.debug("[Response] Generated: %s", response_text)
     
     if state.session_id:
         await event_manager.emit(state.session_id, "agent_status", {
@@ -607,7 +886,7 @@ async def response_node(state: SharedState) -> SharedState:
 # Routing Logic
 # ============================================================================
 
-def route_after_coordinator(state: SharedState) -> Literal["flight_agent", "hotel_agent", "response"]:
+def route_after_coordinator(state: SharedState) -> Literal["flight_agent", "hotel_agent", "combined_agent", "response"]:
     """
     Determine which agent(s) to invoke after coordinator.
     
@@ -618,26 +897,13 @@ def route_after_coordinator(state: SharedState) -> Literal["flight_agent", "hote
     elif state.current_intent == Intent.HOTEL:
         return "hotel_agent"
     elif state.current_intent == Intent.COMBINED:
-        # For combined, we'll go to flight first, then hotel
-        return "flight_agent"
+        # For combined, search flights and hotels in parallel
+        return "combined_agent"
     else:
         # For OTHER or unknown, skip to response
         return "response"
 
 
-def route_after_flight(state: SharedState) -> Literal["hotel_agent", "response"]:
-    """
-    Determine next step after flight agent.
-    
-    If intent is COMBINED, continue to hotel search.
-    Otherwise, go to response.
-    """
-    if state.current_intent == Intent.COMBINED:
-        return "hotel_agent"
-    else:
-        return "response"
-
-
 # ============================================================================
 # Graph Construction
 # ============================================================================
@@ -647,9 +913,10 @@ def create_travel_graph() -> StateGraph:
     Create and compile the LangGraph travel assistant graph.
     
     Graph flow:
-    START -> coordinator -> [flight_agent | hotel_agent | response]
-    flight_agent -> [hotel_agent | response]
+    START -> coordinator -> [flight_agent | hotel_agent | combined_agent | response]
+    flight_agent -> response
     hotel_agent -> response
+    combined_agent -> response
     response -> END
     """
     # Initialize graph with SharedState
@@ -659,6 +926,7 @@ def create_travel_graph() -> StateGraph:
     graph.add_node("coordinator", coordinator_node)
     graph.add_node("flight_agent", flight_agent_node)
     graph.add_node("hotel_agent", hotel_agent_node)
+    graph.add_node("combined_agent", combined_agent_node)
     graph.add_node("response", response_node)
     
     # Set entry point
@@ -671,30 +939,28 @@ def create_travel_graph() -> StateGraph:
         {
             "flight_agent": "flight_agent",
             "hotel_agent": "hotel_agent",
+            "combined_agent": "combined_agent",
             "response": "response"
         }
     )
     
-    # Add conditional edges from flight_agent
-    graph.add_conditional_edges(
-        "flight_agent",
-        route_after_flight,
-        {
-            "hotel_agent": "hotel_agent",
-            "response": "response"
-        }
-    )
+    # Flight agent always goes to response (COMBINED runs in combined_agent)
+    graph.add_edge("flight_agent", "response")
     
     # Hotel agent always goes to response
     graph.add_edge("hotel_agent", "response")
     
+    # Combined agent always goes to response
+    graph.add_edge("combined_agent", "response")
+    
     # Response is the final node
     graph.add_edge("response", END)
     
-    # Compile the graph
+    # Compile the graph. No checkpointer: the session's SharedState already
+    # carries everything between runs, and nothing resumes from checkpoints.
     compiled_graph = graph.compile()
     
-    print("[Graph] Travel assistant graph compiled successfully")
+    logger.info("[Graph] Travel assistant graph compiled successfully")
     
     return compiled_graph
 
@@ -7,28 +7,94 @@ Provides wrapper functions for:
 - Response summarization
 """
 
-import json
-from typing import List, Dict, Optional
+import asyncio
+import copy
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, List, Dict, Optional, Tuple
 import google.generativeai as genai
+from google.generativeai.types import generation_types
+import orjson
+from pydantic import TypeAdapter
+from typing_extensions import Required, TypedDict
 
 from .config import GEMINI_API_KEY
 
+logger = logging.getLogger(__name__)
+
 
 # ============================================================================
 # Gemini Configuration
 # ============================================================================
 
+MODEL_NAME = "gemini-2.5-flash-lite"
+
+# Startup never waits longer than this for the warm-up round-trips
+WARM_UP_TIMEOUT_SECONDS = 5
+
 # Configure Gemini API
 if GEMINI_API_KEY:
     try:
         genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-2.5-flash-lite')
+        model = genai.GenerativeModel(MODEL_NAME)
     except Exception as e:
         model = None
-        print(f"Warning: Failed to initialize Gemini: {e}")
+        logger.warning("Failed to initialize Gemini: %s", e)
 else:
     model = None
-    print("Warning: GEMINI_API_KEY not set. LLM features will be disabled.")
+    logger.warning("GEMINI_API_KEY not set. LLM features will be disabled.")
+
+
+# ============================================================================
+# Structured Output Schemas
+# ============================================================================
+
+class IntentFlightParams(TypedDict, total=False):
+    """Flight parameters extracted by the coordinator."""
+    origin: Optional[str]
+    destination: Optional[str]
+    depart_date: Optional[str]
+    return_date: Optional[str]
+    passengers: Optional[int]
+    cabin_class: Optional[str]
+    max_stops: Optional[int]
+
+
+class IntentHotelParams(TypedDict, total=False):
+    """Hotel parameters extracted by the coordinator."""
+    city: Optional[str]
+    check_in: Optional[str]
+    check_out: Optional[str]
+    guests: Optional[int]
+    budget: Optional[str]
+    min_rating: Optional[float]
+
+
+class IntentSelectedItem(TypedDict, total=False):
+    """Flight/hotel the user is selecting or booking."""
+    type: str  # "flight" | "hotel"
+    identifier: str
+    action: str  # "select" | "book"
+
+
+class IntentClassification(TypedDict, total=False):
+    """
+    Response schema for classify_intent (mirrors COORDINATOR_SYSTEM_PROMPT).
+    
+    TypedDicts rather than pydantic models: google-generativeai rejects
+    schemas carrying field defaults ("Unknown field for Schema: default").
+    """
+    intent: Required[str]  # "flight" | "hotel" | "combined" | "refine" | "other"
+    flight_params: Optional[IntentFlightParams]
+    hotel_params: Optional[IntentHotelParams]
+    selected_item: Optional[IntentSelectedItem]
+    is_correction: Optional[bool]
+
+
+_intent_adapter = TypeAdapter(IntentClassification)
 
 
 # ============================================================================
@@ -128,14 +194,139 @@ Guidelines:
 - Be helpful, enthusiastic, and conversational"""
 
 
+# ============================================================================
+# Prompt Models
+# ============================================================================
+
+# system_prompt -> model carrying it as system_instruction
+_instruction_models: Dict[str, genai.GenerativeModel] = {}
+
+
+def _get_instruction_model(system_prompt: str) -> genai.GenerativeModel:
+    """
+    Return a model with `system_prompt` set as its system instruction.
+    
+    Keeping the system prompt out of the user content gives every request
+    the same leading tokens, which is what Gemini's implicit prefix caching
+    keys on. (The prompts here are far below the 2048-token minimum for
+    explicit context caching.)
+    """
+    instruction_model = _instruction_models.get(system_prompt)
+    if instruction_model is None:
+        instruction_model = genai.GenerativeModel(
+            MODEL_NAME,
+            system_instruction=system_prompt,
+        )
+        _instruction_models[system_prompt] = instruction_model
+    return instruction_model
+
+
+async def warm_up_gemini() -> None:
+    """
+    Prepare Gemini connections and prompt models before the first request.
+    
+    google-generativeai keeps one process-wide sync client and one async
+    client (bound to the running event loop), and every GenerativeModel
+    reuses them. Touching both here moves channel setup and the TLS
+    handshake off the first user turn. It also resolves the per-prompt
+    instruction models. count_tokens is used because it is not billed.
+    
+    The network calls are capped at WARM_UP_TIMEOUT_SECONDS, so a Gemini
+    outage delays startup by seconds rather than the SDK's retry budget.
+    """
+    if model is None:
+        return
+    
+    # Surface an SDK-rejected response schema at startup, not on the first turn
+    schema_supported(IntentClassification)
+    
+    try:
+        for system_prompt in (COORDINATOR_SYSTEM_PROMPT, RESPONSE_SYSTEM_PROMPT):
+            _get_instruction_model(system_prompt)
+        
+        await asyncio.wait_for(_warm_up_clients(), timeout=WARM_UP_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning("Gemini warm-up timed out after %ss, continuing startup", WARM_UP_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.warning("Gemini warm-up failed: %s", e)
+
+
+async def _warm_up_clients() -> None:
+    """Make one cheap call on each Gemini client."""
+    # Sync client (used by generate_text, run in worker threads)
+    await asyncio.to_thread(_get_instruction_model(COORDINATOR_SYSTEM_PROMPT).count_tokens, "ping")
+    
+    # Async client (used by streaming) - created on this event loop
+    await _get_response_model().count_tokens_async("ping")
+
+
 # ============================================================================
 # Core LLM Functions
 # ============================================================================
 
+def _response_text(response, strip: bool = True) -> str:
+    """
+    Read the first candidate's text straight from its parts.
+    
+    Avoids the `response.text` accessor, which re-validates the response and
+    joins the parts into a fresh string on every access.
+    """
+    parts = response.candidates[0].content.parts
+    text = parts[0].text if len(parts) == 1 else "".join(part.text for part in parts)
+    return text.strip() if strip else text
+
+
+# response_schema -> whether the installed SDK can convert it
+_schema_support: Dict[Any, bool] = {}
+
+
+def schema_supported(response_schema: Any) -> bool:
+    """
+    Check once per schema that google-generativeai can convert it.
+    
+    Runs the SDK's own GenerationConfig normalization (no network call).
+    An unsupported schema would otherwise fail every request inside
+    generate_content, so it is logged here and callers get plain output.
+    """
+    supported = _schema_support.get(response_schema)
+    if supported is None:
+        try:
+            generation_types.to_generation_config_dict(
+                genai.types.GenerationConfig(
+                    response_mime_type="application/json",
+                    response_schema=response_schema,
+                )
+            )
+            supported = True
+        except Exception as e:
+            logger.warning("Response schema %s rejected, using unconstrained output: %s", response_schema, e)
+            supported = False
+        _schema_support[response_schema] = supported
+    return supported
+
+
+def parse_json_response(response_text: str) -> Any:
+    """
+    Parse a JSON reply from generate_text.
+    
+    Schema-constrained replies are bare JSON; unconstrained ones may wrap
+    it in a ```json fenced block, which is stripped before a second try.
+    """
+    try:
+        return orjson.loads(response_text)
+    except orjson.JSONDecodeError:
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[0].strip()
+        elif "```" in response_text:
+            response_text = response_text.split("```")[1].split("```")[0].strip()
+        return orjson.loads(response_text)
+
+
 def generate_text(
     system_prompt: str,
     user_message: str,
-    temperature: float = 0.7
+    temperature: float = 0.7,
+    response_schema: Optional[type] = None
 ) -> str:
     """
     Generate text using Gemini.
@@ -144,6 +335,9 @@ def generate_text(
         system_prompt: System instructions for the model
         user_message: User's input message
         temperature: Sampling temperature (0.0-1.0)
+        response_schema: Optional TypedDict (or list[...] of one); switches
+            Gemini to JSON output. Schemas the SDK cannot convert are
+            dropped and the call goes out unconstrained.
     
     Returns:
         Generated text response
@@ -151,22 +345,32 @@ def generate_text(
     if model is None:
         return "LLM not configured (missing API key)"
     
+    if response_schema is not None and not schema_supported(response_schema):
+        response_schema = None
+    
     try:
-        # Combine system prompt and user message
-        full_prompt = f"{system_prompt}\n\nUser: {user_message}\n\nAssistant:"
-        
-        # Generate response
-        response = model.generate_content(
-            full_prompt,
-            generation_config=genai.types.GenerationConfig(
+        if response_schema is not None:
+            generation_config = genai.types.GenerationConfig(
                 temperature=temperature,
+                response_mime_type="application/json",
+                response_schema=response_schema,
             )
+        else:
+            generation_config = genai.types.GenerationConfig(
+                temperature=temperature,
+            )
+        
+        # Generate response (system prompt travels as system_instruction)
+        response = _get_instruction_model(system_prompt).generate_content(
+            user_message,
+            generation_config=generation_config
         )
         
-        return response.text.strip()
+        # JSON parsers skip surrounding whitespace, so structured output is returned as-is
+        return _response_text(response, strip=response_schema is None)
     
     except Exception as e:
-        print(f"Error generating text: {e}")
+        logger.exception("Error generating text")
         return f"Error: {str(e)}"
 
 
@@ -197,7 +401,7 @@ def transcribe_audio(audio_bytes: bytes) -> str:
         
         return response.text.strip()
     except Exception as e:
-        print(f"Error transcribing audio: {e}")
+        logger.exception("Error transcribing audio")
         return f"Error: {str(e)}"
 
 
@@ -205,9 +409,20 @@ def transcribe_audio(audio_bytes: bytes) -> str:
 # Specialized LLM Functions
 # ============================================================================
 
+def format_history_tail(conversation_history: Optional[List[Dict[str, str]]]) -> str:
+    """Render the last few turns exactly as classify_intent sends them to the model."""
+    if not conversation_history:
+        return ""
+    return "\n".join([
+        f"{turn['sender']}: {turn['text']}"
+        for turn in conversation_history[-INTENT_HISTORY_TURNS:]  # Last 3 turns
+    ])
+
+
 def classify_intent(
     user_message: str,
-    conversation_history: List[Dict[str, str]] = None
+    conversation_history: List[Dict[str, str]] = None,
+    history_tail: Optional[str] = None
 ) -> Dict:
     """
     Classify user intent and extract parameters using Gemini.
@@ -215,47 +430,286 @@ def classify_intent(
     Args:
         user_message: Latest user message
         conversation_history: Optional list of previous conversation turns
+        history_tail: Pre-rendered format_history_tail() output; skips
+            re-rendering conversation_history when supplied
     
     Returns:
         Dict with intent and extracted parameters
     """
-    if model is None:
+    result = _classify_intent_llm(user_message, conversation_history, history_tail)
+    if result is None:
         # Fallback to keyword-based classification
         return _fallback_intent_classification(user_message)
+    return result
+
+
+def _classify_intent_llm(
+    user_message: str,
+    conversation_history: List[Dict[str, str]] = None,
+    history_tail: Optional[str] = None
+) -> Optional[Dict]:
+    """
+    Gemini half of classify_intent.
+    
+    Returns:
+        Dict with intent and extracted parameters, or None when the LLM is
+        unavailable or its reply could not be used (callers fall back)
+    """
+    if model is None:
+        return None
     
     try:
         # Add conversation context if available
-        context = ""
-        if conversation_history:
-            recent_history = conversation_history[-3:]  # Last 3 turns
-            context = "\n".join([
-                f"{turn['sender']}: {turn['text']}" 
-                for turn in recent_history
-            ])
-            context = f"Recent conversation:\n{context}\n\n"
+        if history_tail is None:
+            history_tail = format_history_tail(conversation_history)
+        context = f"Recent conversation:\n{history_tail}\n\n" if history_tail else ""
         
         prompt = f"{context}Current user message: {user_message}"
         
+        # Schema-constrained output: Gemini emits bare JSON matching IntentClassification
         response_text = generate_text(
             COORDINATOR_SYSTEM_PROMPT,
             prompt,
-            temperature=0.3  # Lower temperature for structured output
+            temperature=0.3,  # Lower temperature for structured output
+            response_schema=IntentClassification
         )
+        if response_text.startswith("Error:"):
+            return None
         
-        # Parse JSON response
-        # Clean markdown code blocks if present
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-        
-        result = json.loads(response_text)
-        return result
+        result = _intent_adapter.validate_python(parse_json_response(response_text))
+        return _drop_none(result)
     
-    except Exception as e:
-        print(f"Error in intent classification: {e}")
-        # Fallback to keyword-based
+    except Exception:
+        logger.exception("Error in intent classification")
+        return None
+
+
+def _drop_none(value: Dict) -> Dict:
+    """Recursively drop None fields so downstream .get() defaults still apply."""
+    return {
+        key: _drop_none(item) if isinstance(item, dict) else item
+        for key, item in value.items()
+        if item is not None
+    }
+
+
+# ============================================================================
+# Intent Classification Cache
+# ============================================================================
+
+INTENT_CACHE_MAXSIZE = 2048
+INTENT_CACHE_TTL_SECONDS = 600
+
+# classify_intent only shows the model this many trailing turns
+INTENT_HISTORY_TURNS = 3
+
+# Messages that never need the LLM: greetings and thanks carry no travel intent.
+# Affirmatives ("yes", "ok") are deliberately excluded - they confirm bookings.
+_TRIVIAL_MESSAGE_RE = re.compile(r"^(hi|hello|hey|thanks|thank you|thx)[\s.!]*$")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Corrections depend on what the user said before, so they always go to the LLM
+_CORRECTION_PREFIXES = ("actually", "no,", "no ", "i meant", "i said")
+
+# Stops phrasing -> max_stops (mirrors STOPS HANDLING in COORDINATOR_SYSTEM_PROMPT)
+_STOPS_TABLE = {
+    "direct": 0,
+    "nonstop": 0,
+    "non-stop": 0,
+    "one stop": 1,
+    "1 stop": 1,
+    "two stop": 2,
+    "two stops": 2,
+    "2 stop": 2,
+    "2 stops": 2,
+    "with connections": 2,
+}
+_STOPS_ALT = "|".join(re.escape(phrase) for phrase in sorted(_STOPS_TABLE, key=len, reverse=True))
+_STOPS_RE = re.compile(rf"\b({_STOPS_ALT})\b", re.IGNORECASE)
+
+# Fully structured requests such as "direct flights from JFK to LAX". The whole
+# message must match, so nothing the LLM would extract (dates, cabin...) is lost.
+_QUICK_FLIGHT_RE = re.compile(
+    r"^\s*(?i:(?:find|show|search|get)(?: me)?\s+)?"
+    rf"(?i:(?P<stops>{_STOPS_ALT})\s+flights?)"
+    r"(?:\s+(?i:from)\s+(?P<origin>[A-Z]{3}))?"
+    r"\s+(?i:to)\s+(?P<destination>[A-Z]{3})[\s.!?]*$"
+)
+
+# (normalized message, history key) -> (stored_at, classification result)
+_intent_cache: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+intent_cache_stats = {"hits": 0, "misses": 0, "prefiltered": 0, "uncached": 0}
+
+
+def _normalize_message(message: str) -> str:
+    """Lowercase, strip and collapse whitespace for cache keying."""
+    return _WHITESPACE_RE.sub(" ", message.lower().strip())
+
+
+def _history_key(history_tail: str) -> str:
+    """
+    Hash the rendered history tail that classify_intent sends to the model.
+    
+    Returns a fixed-length blake2b digest so keys stay small regardless of
+    how long the individual turns are.
+    """
+    if not history_tail:
+        return ""
+    return hashlib.blake2b(history_tail.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _extract_max_stops(message: str) -> Optional[int]:
+    """Map stops phrasing ("direct", "1 stop", ...) to max_stops, or None."""
+    match = _STOPS_RE.search(message)
+    if match is None:
+        return None
+    return _STOPS_TABLE[match.group(1).lower()]
+
+
+def _quick_flight_intent(user_message: str) -> Optional[Dict]:
+    """
+    Classify unambiguous stops + IATA requests without calling Gemini.
+    
+    Returns:
+        Flight intent dict, or None when the message needs the LLM
+    """
+    match = _QUICK_FLIGHT_RE.match(user_message)
+    if match is None:
+        return None
+    
+    flight_params = {
+        "destination": match.group("destination"),
+        "max_stops": _STOPS_TABLE[match.group("stops").lower()],
+    }
+    if match.group("origin"):
+        flight_params["origin"] = match.group("origin")
+    return {"intent": "flight", "flight_params": flight_params}
+
+
+def classify_intent_cached(
+    user_message: str,
+    conversation_history: List[Dict[str, str]] = None,
+    has_flight_context: bool = False
+) -> Dict:
+    """
+    Cached wrapper around classify_intent.
+    
+    Keys on the normalized message plus a digest of the last few history
+    turns, so repeated turns skip the Gemini round-trip. Only real Gemini
+    classifications are cached, for INTENT_CACHE_TTL_SECONDS; keyword
+    fallbacks (LLM down or reply unusable) are not, so an outage does not
+    pin degraded results. Trivial greetings short-circuit to "other" without
+    any LLM call; likely corrections ("actually...", "i meant...") are never
+    cached.
+    
+    Args:
+        user_message: Latest user message
+        conversation_history: Optional list of previous conversation turns
+        has_flight_context: Earlier turns already set flight parameters; the
+            regex fast path is skipped so the LLM can carry them over
+    
+    Returns:
+        Dict with intent and extracted parameters (a private copy)
+    """
+    normalized = _normalize_message(user_message)
+    
+    if _TRIVIAL_MESSAGE_RE.match(normalized):
+        intent_cache_stats["prefiltered"] += 1
+        return {"intent": "other"}
+    
+    # The fast path only sees this message, so it would drop origin/dates/
+    # passengers supplied earlier; with prior flight context, ask the LLM
+    quick = None if has_flight_context else _quick_flight_intent(user_message)
+    if quick is not None:
+        intent_cache_stats["prefiltered"] += 1
+        return quick
+    
+    # Render the history tail once; it feeds both the cache key and the prompt
+    history_tail = format_history_tail(conversation_history)
+    
+    if normalized.startswith(_CORRECTION_PREFIXES):
+        intent_cache_stats["uncached"] += 1
+        return classify_intent(user_message, history_tail=history_tail)
+    
+    key = (normalized, _history_key(history_tail))
+    now = time.monotonic()
+    
+    entry = _intent_cache.get(key)
+    if entry is not None:
+        stored_at, cached = entry
+        if now - stored_at <= INTENT_CACHE_TTL_SECONDS:
+            _intent_cache.move_to_end(key)
+            intent_cache_stats["hits"] += 1
+            return copy.deepcopy(cached)
+        del _intent_cache[key]
+    
+    intent_cache_stats["misses"] += 1
+    result = _classify_intent_llm(user_message, history_tail=history_tail)
+    if result is None:
         return _fallback_intent_classification(user_message)
+    
+    _intent_cache[key] = (now, copy.deepcopy(result))
+    if len(_intent_cache) > INTENT_CACHE_MAXSIZE:
+        _intent_cache.popitem(last=False)
+    
+    return result
+
+
+# ============================================================================
+# Fallback Keyword Scanner
+# ============================================================================
+
+# Whole-message confirmations (exact match, O(1) lookup)
+_AFFIRMATIVES = frozenset({
+    "yes", "yeah", "sure", "ok", "yep", "yup", "confirm", "proceed", "book it", "go ahead"
+})
+
+# Keyword groups used by the keyword-based intent fallback
+_KEYWORD_GROUPS = {
+    "book": ("book it", "confirm", "proceed"),
+    "selection": ("i'll take", "i will take", "select", "choose", "take the", "take that"),
+    "airline": ("delta", "united", "american", "southwest", "jetblue", "alaska", "spirit", "frontier", "major airline"),
+    "flight": ("flight",),
+    "fly": ("flying", "fly"),
+    "hotel": ("hotel",),
+    "lodging": ("stay", "accommodation"),
+    "trip": ("trip", "plan"),
+}
+
+# One bit per group; a scan returns the OR of every group that matched
+_KEYWORD_BITS = {name: 1 << i for i, name in enumerate(_KEYWORD_GROUPS)}
+_KW_BOOK = _KEYWORD_BITS["book"]
+_KW_SELECTION = _KEYWORD_BITS["selection"]
+_KW_AIRLINE = _KEYWORD_BITS["airline"]
+_KW_FLIGHT = _KEYWORD_BITS["flight"]
+_KW_FLY = _KEYWORD_BITS["fly"]
+_KW_HOTEL = _KEYWORD_BITS["hotel"]
+_KW_LODGING = _KEYWORD_BITS["lodging"]
+_KW_TRIP = _KEYWORD_BITS["trip"]
+
+# All groups in a single alternation. The zero-width lookahead lets matches
+# overlap, preserving the plain substring semantics of `keyword in message`.
+_KEYWORD_RE = re.compile(
+    "(?=(?:"
+    + "|".join(
+        f"(?P<{name}>{'|'.join(re.escape(word) for word in words)})"
+        for name, words in _KEYWORD_GROUPS.items()
+    )
+    + "))"
+)
+
+
+def is_affirmative(user_message: str) -> bool:
+    """True for bare confirmations such as "yes", "ok" or "book it"."""
+    return _normalize_message(user_message).rstrip(".!") in _AFFIRMATIVES
+
+
+def _scan_keywords(message_lower: str) -> int:
+    """Scan a lowercased message once and return the bitmask of matched groups."""
+    hits = 0
+    for match in _KEYWORD_RE.finditer(message_lower):
+        hits |= _KEYWORD_BITS[match.lastgroup]
+    return hits
 
 
 def _fallback_intent_classification(user_message: str) -> Dict:
@@ -265,7 +719,7 @@ def _fallback_intent_classification(user_message: str) -> Dict:
     result = {"intent": "other"}
     
     # Very short affirmative responses = likely confirmation
-    if message_lower in ["yes", "yeah", "sure", "ok", "yep", "yup", "confirm", "proceed", "book it", "go ahead"]:
+    if message_lower in _AFFIRMATIVES:
         result["intent"] = "other"
         result["selected_item"] = {
             "type": "flight",  # Will be determined by context
@@ -274,8 +728,10 @@ def _fallback_intent_classification(user_message: str) -> Dict:
         }
         return result
     
+    hits = _scan_keywords(message_lower)
+    
     # Check for explicit booking keywords
-    if "book it" in message_lower or "confirm" in message_lower or "proceed" in message_lower:
+    if hits & _KW_BOOK:
         result["intent"] = "other"
         result["selected_item"] = {
             "type": "flight",
@@ -284,13 +740,9 @@ def _fallback_intent_classification(user_message: str) -> Dict:
         }
         return result
     
-    # Check for selection keywords (user is choosing an option)
-    selection_keywords = ["i'll take", "i will take", "select", "choose", "take the", "take that"]
-    airline_keywords = ["delta", "united", "american", "southwest", "jetblue", "alaska", "spirit", "frontier", "major airline"]
-    
     # Check if user is selecting a flight
-    if any(keyword in message_lower for keyword in selection_keywords):
-        if "flight" in message_lower or any(airline in message_lower for airline in airline_keywords):
+    if hits & _KW_SELECTION:
+        if hits & (_KW_FLIGHT | _KW_AIRLINE):
             result["intent"] = "other"
             result["selected_item"] = {
                 "type": "flight", 
@@ -298,7 +750,7 @@ def _fallback_intent_classification(user_message: str) -> Dict:
                 "action": "select"
             }
             return result
-        elif "hotel" in message_lower:
+        elif hits & _KW_HOTEL:
             result["intent"] = "other"
             result["selected_item"] = {
                 "type": "hotel", 
@@ -308,7 +760,7 @@ def _fallback_intent_classification(user_message: str) -> Dict:
             return result
     
     # Standalone airline/hotel name = selection
-    if any(airline in message_lower for airline in airline_keywords) and len(message_lower.split()) <= 4:
+    if hits & _KW_AIRLINE and len(message_lower.split()) <= 4:
         result["intent"] = "other"
         result["selected_item"] = {
             "type": "flight",
@@ -318,16 +770,193 @@ def _fallback_intent_classification(user_message: str) -> Dict:
         return result
     
     # Check if user wants to search
-    if "flight" in message_lower or "fly" in message_lower or "flying" in message_lower:
+    if hits & (_KW_FLIGHT | _KW_FLY):
         result["intent"] = "flight"
-    elif "hotel" in message_lower or "stay" in message_lower or "accommodation" in message_lower:
+        max_stops = _extract_max_stops(message_lower)
+        if max_stops is not None:
+            result["flight_params"] = {"max_stops": max_stops}
+    elif hits & (_KW_HOTEL | _KW_LODGING):
         result["intent"] = "hotel"
-    elif ("flight" in message_lower and "hotel" in message_lower) or "trip" in message_lower or "plan" in message_lower:
+    elif hits & _KW_TRIP:
         result["intent"] = "combined"
     
     return result
 
 
+# ============================================================================
+# Response Cache
+# ============================================================================
+
+RESPONSE_CACHE_MAXSIZE = 256
+
+# (intent, normalized prompt) -> generated response text
+_response_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+response_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _response_cache_key(intent: str, prompt: str) -> Tuple[str, str]:
+    """
+    Build the response cache key.
+    
+    The prompt already encodes the user request, selection state and the
+    top results shown to the model, so identical searches collapse onto
+    the same key regardless of casing or whitespace.
+    """
+    return (intent, _normalize_message(prompt))
+
+
+def _response_cache_get(key: Tuple[str, str]) -> Optional[str]:
+    """Return a cached response (refreshing its LRU position) or None."""
+    cached = _response_cache.get(key)
+    if cached is None:
+        response_cache_stats["misses"] += 1
+        return None
+    try:
+        _response_cache.move_to_end(key)
+    except KeyError:
+        # Evicted by a concurrent generate_response_summary worker thread
+        pass
+    response_cache_stats["hits"] += 1
+    return cached
+
+
+def _response_cache_put(key: Tuple[str, str], response: str) -> None:
+    """Store a generated response, evicting the least recently used entry."""
+    # Never cache empty output or errors surfaced by generate_text
+    if not response or response.startswith("Error:"):
+        return
+    _response_cache[key] = response
+    if len(_response_cache) > RESPONSE_CACHE_MAXSIZE:
+        _response_cache.popitem(last=False)
+
+
+# Per-row templates for the result summaries in the response prompt
+_FLIGHT_ROW_TMPL = "- %s %s: $%s (%s stops, %s)"
+_HOTEL_ROW_TMPL = "- %s: $%s/night (%s★, %s/10 rating)"
+_MATCHING_FLIGHT_ROW_TMPL = "- %s %s: $%s"
+_MATCHING_HOTEL_ROW_TMPL = "- %s: $%s/night (%s★)"
+
+_INF = float('inf')
+
+
+def _extract_hhmm(departure_time: Optional[str]) -> str:
+    """Return HH:MM from an ISO datetime string, or 'N/A' without a time part."""
+    _, sep, time_part = (departure_time or "").partition("T")
+    return time_part[:5] if sep else "N/A"
+
+
+def _fmt_flight_row(f: dict) -> str:
+    return _FLIGHT_ROW_TMPL % (
+        f.get('airline', 'N/A'), f.get('flight_number', ''), f.get('price', 'N/A'),
+        f.get('stops', 0), _extract_hhmm(f.get('departure_time')),
+    )
+
+
+def _fmt_hotel_row(h: dict) -> str:
+    return _HOTEL_ROW_TMPL % (
+        h.get('name', 'N/A'), h.get('price_per_night', 'N/A'),
+        h.get('star_rating', 'N/A'), h.get('review_score', 'N/A'),
+    )
+
+
+def _fmt_matching_flight_row(f: dict) -> str:
+    return _MATCHING_FLIGHT_ROW_TMPL % (
+        f.get('airline', 'N/A'), f.get('flight_number', ''), f.get('price', 'N/A'),
+    )
+
+
+def _fmt_matching_hotel_row(h: dict) -> str:
+    return _MATCHING_HOTEL_ROW_TMPL % (
+        h.get('name', 'N/A'), h.get('price_per_night', 'N/A'), h.get('star_rating', 'N/A'),
+    )
+
+
+def _build_response_context(
+    flight_results: list = None,
+    hotel_results: list = None,
+    user_message: str = "",
+    context: dict = None
+) -> str:
+    """
+    Build the response prompt (result context only) sent with RESPONSE_SYSTEM_PROMPT.
+    
+    Shared by generate_response_summary and both streaming generators, so
+    they also share response cache entries.
+    """
+    # Read every context key once up front
+    ctx = context or {}
+    sel_f, pend_f, match_f = ctx.get("selected_flight"), ctx.get("pending_flight"), ctx.get("matching_flights")
+    sel_h, pend_h, match_h = ctx.get("selected_hotel"), ctx.get("pending_hotel"), ctx.get("matching_hotels")
+    action = ctx.get("action", "select")
+    
+    # Build context for LLM, most stable content first so consecutive turns
+    # share the longest possible prompt prefix:
+    #   stable  - task framing that never changes
+    #   session - confirmed bookings (change rarely)
+    #   volatile - this turn's request, selection state and results
+    stable_parts = ["Generate a helpful, friendly response to the user."]
+    session_parts = []
+    volatile_parts = []
+    
+    # Mention confirmed bookings even if we don't have current results
+    if sel_f and not pend_f and not match_f:
+        # User has a confirmed flight but no current flight results
+        session_parts.append(f"User has previously confirmed flight booking: {sel_f}")
+        session_parts.append("Acknowledge this booking in your response if relevant to the current query.")
+    
+    if sel_h and not pend_h and not match_h:
+        # User has a confirmed hotel but no current hotel results
+        session_parts.append(f"User has previously confirmed hotel booking: {sel_h}")
+        session_parts.append("Acknowledge this booking in your response if relevant to the current query.")
+    
+    if user_message:
+        volatile_parts.append(f"User request: {user_message}")
+    
+    # Handle selections and bookings
+    if sel_f or pend_f:
+        flight_id = pend_f or sel_f
+        
+        if action == "select" and pend_f:
+            # User just selected, ask for confirmation
+            volatile_parts.append(f"User is SELECTING (not booking yet): {flight_id}")
+            volatile_parts.append("IMPORTANT: Response MUST ask 'Would you like me to proceed with booking this flight?' Do NOT confirm booking yet.")
+        elif action == "book":
+            # User confirmed booking
+            volatile_parts.append(f"User has CONFIRMED BOOKING for: {flight_id}")
+            volatile_parts.append("IMPORTANT: Response MUST confirm booking is complete. Say 'Your booking is confirmed' or similar.")
+    
+    if sel_h or pend_h:
+        hotel_id = pend_h or sel_h
+        
+        if action == "select" and pend_h:
+            volatile_parts.append(f"User is SELECTING hotel: {hotel_id}")
+            volatile_parts.append("IMPORTANT: Response MUST ask 'Would you like me to proceed with booking this hotel?' Do NOT confirm booking yet.")
+        elif action == "book":
+            volatile_parts.append(f"User has CONFIRMED hotel booking: {hotel_id}")
+            volatile_parts.append("IMPORTANT: Response MUST confirm the booking is complete. Say 'Your hotel booking is confirmed' or similar.")
+    
+    if flight_results:
+        # Summarize top 3 flights
+        flights_summary = "\n".join([_fmt_flight_row(f) for f in flight_results[:3]])
+        volatile_parts.append(f"Available flights ({len(flight_results)} total):\n{flights_summary}")
+    
+    if hotel_results:
+        # Summarize top 3 hotels
+        hotels_summary = "\n".join([_fmt_hotel_row(h) for h in hotel_results[:3]])
+        volatile_parts.append(f"Available hotels ({len(hotel_results)} total):\n{hotels_summary}")
+    
+    # Matching results change with every selection, so they always go last
+    if match_f and (sel_f or pend_f):
+        match_summary = "\n".join([_fmt_matching_flight_row(f) for f in match_f[:3]])
+        volatile_parts.append(f"Matching available flights:\n{match_summary}")
+    
+    if match_h and (sel_h or pend_h):
+        match_summary = "\n".join([_fmt_matching_hotel_row(h) for h in match_h[:3]])
+        volatile_parts.append(f"Matching available hotels:\n{match_summary}")
+    
+    return "\n\n".join(stable_parts + session_parts + volatile_parts)
+
+
 def generate_response_summary(
     intent: str,
     flight_results: list = None,
@@ -353,87 +982,12 @@ def generate_response_summary(
         return _fallback_response_generation(intent, flight_results, hotel_results, context)
     
     try:
-        # Build context for LLM
-        context_parts = []
-        
-        if user_message:
-            context_parts.append(f"User request: {user_message}")
-        
-        # Handle selections and bookings
-        if context and (context.get("selected_flight") or context.get("pending_flight")):
-            action = context.get("action", "select")
-            flight_id = context.get("pending_flight") or context.get("selected_flight")
-            
-            if action == "select" and context.get("pending_flight"):
-                # User just selected, ask for confirmation
-                context_parts.append(f"User is SELECTING (not booking yet): {flight_id}")
-                context_parts.append("IMPORTANT: Response MUST ask 'Would you like me to proceed with booking this flight?' Do NOT confirm booking yet.")
-            elif action == "book":
-                # User confirmed booking
-                context_parts.append(f"User has CONFIRMED BOOKING for: {flight_id}")
-                context_parts.append("IMPORTANT: Response MUST confirm booking is complete. Say 'Your booking is confirmed' or similar.")
-            
-            # If we have matching flights, show them
-            if context.get("matching_flights"):
-                matching = context["matching_flights"]
-                match_summary = "\n".join([
-                    f"- {f.get('airline', 'N/A')} {f.get('flight_number', '')}: ${f.get('price', 'N/A')}"
-                    for f in matching[:3]
-                ])
-                context_parts.append(f"Matching available flights:\n{match_summary}")
+        prompt = _build_response_context(flight_results, hotel_results, user_message, context)
         
-        if context and (context.get("selected_hotel") or context.get("pending_hotel")):
-            action = context.get("action", "select")
-            hotel_id = context.get("pending_hotel") or context.get("selected_hotel")
-            
-            if action == "select" and context.get("pending_hotel"):
-                context_parts.append(f"User is SELECTING hotel: {hotel_id}")
-                context_parts.append("IMPORTANT: Response MUST ask 'Would you like me to proceed with booking this hotel?' Do NOT confirm booking yet.")
-            elif action == "book":
-                context_parts.append(f"User has CONFIRMED hotel booking: {hotel_id}")
-                context_parts.append("IMPORTANT: Response MUST confirm the booking is complete. Say 'Your hotel booking is confirmed' or similar.")
-            
-            # If we have matching hotels, show them
-            if context.get("matching_hotels"):
-                matching = context["matching_hotels"]
-                match_summary = "\n".join([
-                    f"- {h.get('name', 'N/A')}: ${h.get('price_per_night', 'N/A')}/night ({h.get('star_rating', 'N/A')}★)"
-                    for h in matching[:3]
-                ])
-                context_parts.append(f"Matching available hotels:\n{match_summary}")
-        
-        # Mention confirmed bookings even if we don't have current results
-        if context and context.get("selected_flight") and not context.get("pending_flight") and not context.get("matching_flights"):
-            # User has a confirmed flight but no current flight results
-            context_parts.append(f"User has previously confirmed flight booking: {context['selected_flight']}")
-            context_parts.append("Acknowledge this booking in your response if relevant to the current query.")
-        
-        if context and context.get("selected_hotel") and not context.get("pending_hotel") and not context.get("matching_hotels"):
-            # User has a confirmed hotel but no current hotel results
-            context_parts.append(f"User has previously confirmed hotel booking: {context['selected_hotel']}")
-            context_parts.append("Acknowledge this booking in your response if relevant to the current query.")
-        
-        if flight_results:
-            # Summarize top 3 flights
-            top_flights = flight_results[:3]
-            flights_summary = "\n".join([
-                f"- {f.get('airline', 'N/A')} {f.get('flight_number', '')}: ${f.get('price', 'N/A')} ({f.get('stops', 0)} stops, {f.get('departure_time', '').split('T')[1][:5] if 'T' in f.get('departure_time', '') else 'N/A'})"
-                for f in top_flights
-            ])
-            context_parts.append(f"Available flights ({len(flight_results)} total):\n{flights_summary}")
-        
-        if hotel_results:
-            # Summarize top 3 hotels
-            top_hotels = hotel_results[:3]
-            hotels_summary = "\n".join([
-                f"- {h.get('name', 'N/A')}: ${h.get('price_per_night', 'N/A')}/night ({h.get('star_rating', 'N/A')}★, {h.get('review_score', 'N/A')}/10 rating)"
-                for h in top_hotels
-            ])
-            context_parts.append(f"Available hotels ({len(hotel_results)} total):\n{hotels_summary}")
-        
-        context_str = "\n\n".join(context_parts)
-        
-        prompt = f"{context_str}\n\nGenerate a helpful, friendly response to the user."
+        cache_key = _response_cache_key(intent, prompt)
+        cached = _response_cache_get(cache_key)
+        if cached is not None:
+            return cached
         
         response = generate_text(
             RESPONSE_SYSTEM_PROMPT,
@@ -441,14 +995,20 @@ def generate_response_summary(
             temperature=0.8  # Higher temperature for more natural language
         )
         
+        _response_cache_put(cache_key, response)
         return response
     
-    except Exception as e:
-        print(f"Error generating response: {e}")
+    except Exception:
+        logger.exception("Error generating response")
         return _fallback_response_generation(intent, flight_results, hotel_results, context)
 
 
-def generate_response_stream(
+def _get_response_model() -> genai.GenerativeModel:
+    """Model for streamed responses, carrying RESPONSE_SYSTEM_PROMPT."""
+    return _get_instruction_model(RESPONSE_SYSTEM_PROMPT)
+
+
+async def generate_response_stream_async(
     intent: str,
     flight_results: list = None,
     hotel_results: list = None,
@@ -456,7 +1016,9 @@ def generate_response_stream(
     context: dict = None
 ):
     """
-    Generate natural language summary of search results (Streaming).
+    Generate natural language summary of search results (Async streaming).
+    
+    Uses generate_content_async so network reads never block the event loop.
     
     Yields:
         Chunks of generated text
@@ -467,84 +1029,16 @@ def generate_response_stream(
         return
     
     try:
-        # Build context for LLM (Reuse logic from generate_response_summary)
-        # ... (Ideally we'd refactor this context building into a helper, but for now we duplicate/inline for safety)
-        context_parts = []
-        
-        if user_message:
-            context_parts.append(f"User request: {user_message}")
-        
-        # Handle selections and bookings
-        if context and (context.get("selected_flight") or context.get("pending_flight")):
-            action = context.get("action", "select")
-            flight_id = context.get("pending_flight") or context.get("selected_flight")
-            
-            if action == "select" and context.get("pending_flight"):
-                context_parts.append(f"User is SELECTING (not booking yet): {flight_id}")
-                context_parts.append("IMPORTANT: Response MUST ask 'Would you like me to proceed with booking this flight?' Do NOT confirm booking yet.")
-            elif action == "book":
-                context_parts.append(f"User has CONFIRMED BOOKING for: {flight_id}")
-                context_parts.append("IMPORTANT: Response MUST confirm booking is complete. Say 'Your booking is confirmed' or similar.")
-            
-            if context.get("matching_flights"):
-                matching = context["matching_flights"]
-                match_summary = "\n".join([
-                    f"- {f.get('airline', 'N/A')} {f.get('flight_number', '')}: ${f.get('price', 'N/A')}"
-                    for f in matching[:3]
-                ])
-                context_parts.append(f"Matching available flights:\n{match_summary}")
-        
-        if context and (context.get("selected_hotel") or context.get("pending_hotel")):
-            action = context.get("action", "select")
-            hotel_id = context.get("pending_hotel") or context.get("selected_hotel")
-            
-            if action == "select" and context.get("pending_hotel"):
-                context_parts.append(f"User is SELECTING hotel: {hotel_id}")
-                context_parts.append("IMPORTANT: Response MUST ask 'Would you like me to proceed with booking this hotel?' Do NOT confirm booking yet.")
-            elif action == "book":
-                context_parts.append(f"User has CONFIRMED hotel booking: {hotel_id}")
-                context_parts.append("IMPORTANT: Response MUST confirm the booking is complete. Say 'Your hotel booking is confirmed' or similar.")
-            
-            if context.get("matching_hotels"):
-                matching = context["matching_hotels"]
-                match_summary = "\n".join([
-                    f"- {h.get('name', 'N/A')}: ${h.get('price_per_night', 'N/A')}/night ({h.get('star_rating', 'N/A')}★)"
-                    for h in matching[:3]
-                ])
-                context_parts.append(f"Matching available hotels:\n{match_summary}")
-        
-        # Mention confirmed bookings even if we don't have current results
-        if context and context.get("selected_flight") and not context.get("pending_flight") and not context.get("matching_flights"):
-            context_parts.append(f"User has previously confirmed flight booking: {context['selected_flight']}")
-            context_parts.append("Acknowledge this booking in your response if relevant to the current query.")
-        
-        if context and context.get("selected_hotel") and not context.get("pending_hotel") and not context.get("matching_hotels"):
-            context_parts.append(f"User has previously confirmed hotel booking: {context['selected_hotel']}")
-            context_parts.append("Acknowledge this booking in your response if relevant to the current query.")
+        full_prompt = _build_response_context(flight_results, hotel_results, user_message, context)
         
-        if flight_results:
-            top_flights = flight_results[:3]
-            flights_summary = "\n".join([
-                f"- {f.get('airline', 'N/A')} {f.get('flight_number', '')}: ${f.get('price', 'N/A')} ({f.get('stops', 0)} stops, {f.get('departure_time', '').split('T')[1][:5] if 'T' in f.get('departure_time', '') else 'N/A'})"
-                for f in top_flights
-            ])
-            context_parts.append(f"Available flights ({len(flight_results)} total):\n{flights_summary}")
+        # Replay a cached response as a single chunk
+        cache_key = _response_cache_key(intent, full_prompt)
+        cached = _response_cache_get(cache_key)
+        if cached is not None:
+            yield cached
+            return
         
-        if hotel_results:
-            top_hotels = hotel_results[:3]
-            hotels_summary = "\n".join([
-                f"- {h.get('name', 'N/A')}: ${h.get('price_per_night', 'N/A')}/night ({h.get('star_rating', 'N/A')}★, {h.get('review_score', 'N/A')}/10 rating)"
-                for h in top_hotels
-            ])
-            context_parts.append(f"Available hotels ({len(hotel_results)} total):\n{hotels_summary}")
-        
-        context_str = "\n\n".join(context_parts)
-        prompt = f"{context_str}\n\nGenerate a helpful, friendly response to the user."
-        
-        # Generate streaming response
-        full_prompt = f"{RESPONSE_SYSTEM_PROMPT}\n\nUser: {prompt}\n\nAssistant:"
-        
-        response = model.generate_content(
+        response = await _get_response_model().generate_content_async(
             full_prompt,
             generation_config=genai.types.GenerationConfig(
                 temperature=0.8,
@@ -552,15 +1046,27 @@ def generate_response_stream(
             stream=True
         )
         
-        for chunk in response:
+        chunks = []
+        async for chunk in response:
             if chunk.text:
+                chunks.append(chunk.text)
                 yield chunk.text
+        
+        _response_cache_put(cache_key, "".join(chunks))
     
-    except Exception as e:
-        print(f"Error generating streaming response: {e}")
+    except Exception:
+        logger.exception("Error generating streaming response")
         yield _fallback_response_generation(intent, flight_results, hotel_results, context)
 
 
+def _cheapest_flight(flight_results: list) -> dict:
+    """Return the lowest-priced flight (the first one on ties)."""
+    # Pull prices out once so min() compares plain numbers in C rather than
+    # calling a Python key function per row
+    prices = [f.get('price', _INF) for f in flight_results]
+    return flight_results[prices.index(min(prices))]
+
+
 def _fallback_response_generation(
     intent: str,
     flight_results: Optional[List] = None,
@@ -602,7 +1108,7 @@ def _fallback_response_generation(
         return " ".join(parts)
     
     if flight_results:
-        cheapest = min(flight_results, key=lambda f: f.get('price', float('inf')))
+        cheapest = _cheapest_flight(flight_results)
         parts.append(
             f"I found {len(flight_results)} flights for you! "
             f"The cheapest option is ${cheapest.get('price', 'N/A')} with {cheapest.get('airline', 'an airline')}."
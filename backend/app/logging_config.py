@@ -0,0 +1,50 @@
+"""
+Logging configuration for the Travel Assistant backend.
+
+Imported by main.py ahead of the graph and tools so their import-time log
+lines are covered. Records are handed to a queue and written to stderr by a
+listener thread, so request handlers never block on stream I/O.
+"""
+
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from .config import ENV
+
+
+def configure_logging() -> QueueListener:
+    """
+    Route root logging through a QueueHandler and start its listener.
+    
+    The QueueHandler is added directly rather than via basicConfig, which
+    would give it a formatter of its own; QueueHandler.prepare() would then
+    bake that prefix into the message and the listener would prefix it again.
+    
+    Returns:
+        The running QueueListener (stopped at interpreter exit)
+    """
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(QueueHandler(log_queue))
+    
+    # Debug output for our own modules only; third-party loggers (httpx,
+    # grpc, asyncio, langchain) stay at INFO and off the queue
+    if ENV == "development":
+        logging.getLogger(__package__).setLevel(logging.DEBUG)
+    
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+log_listener = configure_logging()
@@ -5,15 +5,25 @@ Handles session management, chat endpoints, and WebSocket connections.
 """
 
 import asyncio
+import functools
+import logging
 import time
 import uuid
-from typing import Dict, List, Optional
-
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Response, UploadFile, File, HTTPException
-from fastapi.responses import StreamingResponse
+import weakref
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, List, Optional, Set
+
+import orjson
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, HTTPException
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from starlette.websockets import WebSocketState
+from pydantic import BaseModel, Field, PrivateAttr
 
+# Imported first so module loggers below are covered from import time on
+from .logging_config import log_listener
+from .config import CHECKPOINT_DIR, ENV
 from .models import (
     ConversationTurn,
     SharedState,
@@ -22,11 +32,19 @@ from .models import (
     Intent,
     FlightResult,
     HotelResult,
+    CachedJSONModel,
+    PassengerInfo,
+    PaymentInfo,
 )
 
 # Import the compiled graph
 from .graph.travel_graph import travel_graph
 from .services.event_manager import event_manager
+from .services.checkpoint import load_checkpoint, restore_checkpoint, save_checkpoint
+from .services.summarization import append_turn, compress_history_async, should_summarize, summarization_batcher
+from .llm import warm_up_gemini
+
+logger = logging.getLogger(__name__)
 
 
 # ============================================================================
@@ -38,64 +56,155 @@ class MessageIn(BaseModel):
     message: str
 
 
+class MessageAccepted(BaseModel):
+    """202 response for a queued message."""
+    status: str = "accepted"
+    session_id: str
+    request_id: str
+
+
+# Per-session cap on the raw transcript kept alongside the graph state
+MAX_HISTORY_TURNS = 500
+
+
 class SessionState(BaseModel):
     """State for a single user session."""
     session_id: str
-    history: List[ConversationTurn] = []
-    shared_state: SharedState = SharedState()  # LangGraph state
+    history: Deque[ConversationTurn] = Field(default_factory=lambda: deque(maxlen=MAX_HISTORY_TURNS))
+    shared_state: SharedState = Field(default_factory=SharedState)  # LangGraph state
+    last_active: float = 0.0  # time.monotonic() of the last access
+    last_flight_count: int = 0  # Flight results the UI was last sent (0 = already clear)
+    last_hotel_count: int = 0  # Hotel results the UI was last sent (0 = already clear)
+    
+    # Encoded /history response and the history/summary snapshot it was built from
+    _history_cache: Optional[bytes] = PrivateAttr(default=None)
+    _history_cache_key: Optional[tuple] = PrivateAttr(default=None)
 
 
 # ============================================================================
 # In-Memory Storage
 # ============================================================================
 
-# Session storage: session_id -> SessionState
-sessions: Dict[str, SessionState] = {}
+# Sessions idle longer than this, or beyond the size cap, are evicted (LRU order)
+SESSION_TTL_SECONDS = 3600
+MAX_SESSIONS = 10_000
+
+# Session storage: session_id -> SessionState, least recently used first
+sessions: "OrderedDict[str, SessionState]" = OrderedDict()
 
 # Active run registry for interruption handling
 # Maps session_id -> ActiveRun metadata
 active_runs: Dict[str, ActiveRun] = {}
 
-# Maps session_id -> asyncio.Task (cannot be in Pydantic model)
-active_tasks: Dict[str, asyncio.Task] = {}
+# Maps session_id -> asyncio.Task (cannot be in Pydantic model).
+# Weak values: finished tasks fall out on their own once background_tasks lets go.
+active_tasks: "weakref.WeakValueDictionary[str, asyncio.Task]" = weakref.WeakValueDictionary()
+
+# Strong references to every running graph task (the event loop only keeps weak ones)
+background_tasks: Set[asyncio.Task] = set()
+
+
+def _on_run_done(session_id: str, task: asyncio.Task) -> None:
+    """
+    Done-callback for graph runs; always fires, even if the run was cancelled
+    before its own cleanup could execute.
+    """
+    background_tasks.discard(task)
+    # A newer run may already own the session's slots - leave those alone
+    if active_tasks.get(session_id) is task:
+        active_tasks.pop(session_id, None)
+        active_runs.pop(session_id, None)
+
+
+# ============================================================================
+# Result Serialization & Lookup
+# ============================================================================
+
+def results_json(results: List[CachedJSONModel]) -> orjson.Fragment:
+    """Embed a result list as raw JSON, reusing each result's cached encoding."""
+    return orjson.Fragment(b"[" + b",".join([r.dumped_json() for r in results]) + b"]")
+
+
+def _result_by_id(results: list, index: Dict[str, int], result_id: str):
+    """
+    Find a result by id via the SharedState id index.
+    
+    Args:
+        results: flight_results or hotel_results
+        index: The matching flight_index / hotel_index
+        result_id: Id to look up
+    
+    Returns:
+        The result, or None if it is not (or no longer) in the list
+    """
+    idx = index.get(result_id)
+    if idx is not None and idx < len(results) and results[idx].id == result_id:
+        return results[idx]
+    return None
 
 
 # ============================================================================
 # WebSocket Connection Manager
 # ============================================================================
 
+# Max concurrent sends per broadcast batch before yielding to the event loop
+BROADCAST_BATCH_SIZE = 50
+
+
 class ConnectionManager:
     """Manages WebSocket connections per session."""
     
     def __init__(self):
-        # session_id -> list of active WebSocket connections
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        # session_id -> active WebSocket connections (insertion-ordered set:
+        # dict keys give O(1) removal while keeping connect order)
+        self.active_connections: Dict[str, Dict[WebSocket, None]] = {}
     
     async def connect(self, session_id: str, websocket: WebSocket):
         """Accept and register a WebSocket connection."""
         await websocket.accept()
-        if session_id not in self.active_connections:
-            self.active_connections[session_id] = []
-        self.active_connections[session_id].append(websocket)
+        self.active_connections.setdefault(session_id, {})[websocket] = None
     
     def disconnect(self, session_id: str, websocket: WebSocket):
         """Remove a WebSocket connection."""
-        if session_id in self.active_connections:
-            self.active_connections[session_id].remove(websocket)
-            # Clean up empty session lists
-            if not self.active_connections[session_id]:
+        connections = self.active_connections.get(session_id)
+        if connections is not None:
+            connections.pop(websocket, None)
+            # Clean up empty session entries
+            if not connections:
                 del self.active_connections[session_id]
     
     async def send_json(self, session_id: str, data: dict):
-        """Broadcast JSON data to all connections for a session."""
-        if session_id in self.active_connections:
-            for connection in self.active_connections[session_id]:
-                try:
-                    await connection.send_json(data)
-                except Exception as e:
-                    # Connection might be closed; skip silently
-                    print(f"Error sending to websocket: {e}")
-
+        """Broadcast JSON data to all connections for a session concurrently."""
+        # Copy so a disconnect during the broadcast can't mutate what we iterate.
+        # Sockets that already closed are dropped instead of written to.
+        connections = []
+        for connection in list(self.active_connections.get(session_id, ())):
+            if connection.client_state == WebSocketState.CONNECTED:
+                connections.append(connection)
+            else:
+                self.disconnect(session_id, connection)
+        if not connections:
+            return
+        
+        # Encode once for every connection instead of once per send
+        payload = orjson.dumps(data).decode("utf-8")
+        
+        # Fan out in bounded batches, yielding to the loop between them
+        for start in range(0, len(connections), BROADCAST_BATCH_SIZE):
+            batch = connections[start:start + BROADCAST_BATCH_SIZE]
+            results = await asyncio.gather(
+                *(connection.send_text(payload) for connection in batch),
+                return_exceptions=True
+            )
+            
+            for connection, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    # Connection might be closed; disconnects are expected
+                    logger.debug("Error sending to websocket: %s", result)
+                    self.disconnect(session_id, connection)
+            
+            if start + BROADCAST_BATCH_SIZE < len(connections):
+                await asyncio.sleep(0)
 
 manager = ConnectionManager()
 
@@ -108,26 +217,85 @@ def get_or_create_session(session_id: Optional[str]) -> SessionState:
     """
     Get existing session or create a new one.
     If session_id is None, generates a new UUID.
+    A client-supplied id that is not in memory is restored from its
+    checkpoint when CHECKPOINT_DIR is set.
     """
+    restorable = session_id is not None and bool(CHECKPOINT_DIR)
     if session_id is None:
         session_id = uuid.uuid4().hex
     
-    if session_id not in sessions:
-        sessions[session_id] = SessionState(session_id=session_id, history=[])
+    now = time.monotonic()
+    session = sessions.get(session_id)
+    if session is None:
+        session = SessionState(session_id=session_id)
         # Initialize session_id in shared state
-        sessions[session_id].shared_state.session_id = session_id
+        session.shared_state.session_id = session_id
+        if restorable:
+            checkpoint = load_checkpoint(CHECKPOINT_DIR, session_id)
+            if checkpoint is not None:
+                restore_checkpoint(session.shared_state, checkpoint)
+        sessions[session_id] = session
+        evict_stale_sessions(now)
+    else:
+        sessions.move_to_end(session_id)
     
-    return sessions[session_id]
+    session.last_active = now
+    return session
+
+
+def evict_stale_sessions(now: float) -> None:
+    """
+    Evict sessions from the LRU end while they are expired or over capacity.
+    
+    Also cancels any run still in flight for an evicted session and drops
+    its run lock and event buffer.
+    """
+    while sessions:
+        session_id, oldest = next(iter(sessions.items()))
+        expired = now - oldest.last_active > SESSION_TTL_SECONDS
+        if not expired and len(sessions) <= MAX_SESSIONS:
+            break
+        
+        del sessions[session_id]
+        active_runs.pop(session_id, None)
+        task = active_tasks.pop(session_id, None)
+        if task is not None:
+            task.cancel()
+        event_manager.discard_session(session_id)
+        logger.info("Evicted session %s", session_id)
 
 
 # ============================================================================
 # FastAPI App
 # ============================================================================
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan.
+    
+    Startup: open the Gemini connections before the first chat request.
+    Shutdown: cancel graph runs still in flight and wait for them to unwind,
+    so they can notify clients instead of being destroyed while pending,
+    then stop the summarization batcher's worker.
+    """
+    await warm_up_gemini()
+    
+    yield
+    
+    tasks = list(background_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    
+    await summarization_batcher.close()
+
+
 app = FastAPI(
     title="Travel Assistant API",
     description="Multi-agent travel planning assistant with LangGraph",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -154,13 +322,17 @@ async def run_graph_background(session_id: str, request_id: str):
     """
     Background task to run the LangGraph agent.
     """
-    print(f"[Background] Starting run for session {session_id}, request {request_id}")
+    logger.debug("[Background] Starting run for session %s, request %s", session_id, request_id)
     session = get_or_create_session(session_id)
     
     try:
-        # Compress conversation history if needed (before processing)
-        from .services.summarization import compress_history
-        session.shared_state = compress_history(session.shared_state)
+        # Phase timings (compress / invoke / broadcast), logged once per completed run
+        t0 = time.perf_counter_ns()
+        
+        # Compress conversation history once it crosses the turn/token threshold (before processing)
+        if should_summarize(session.shared_state.conversation_history, session.shared_state.approx_tokens):
+            session.shared_state = await compress_history_async(session.shared_state)
+        t1 = time.perf_counter_ns()
         
         # Send status update
         await manager.send_json(session_id, {
@@ -170,24 +342,35 @@ async def run_graph_background(session_id: str, request_id: str):
         })
         
         # Execute the graph with async invoke
-        # LangGraph nodes are now async, so we use ainvoke
-        result_state = await travel_graph.ainvoke(session.shared_state)
+        # LangGraph nodes are now async, so we use ainvoke.
+        # The per-session lock keeps overlapping runs from mutating the same SharedState.
+        async with event_manager.get_lock(session_id):
+            result_state = await travel_graph.ainvoke(session.shared_state)
+        t2 = time.perf_counter_ns()
         
-        # LangGraph returns a dict, convert back to SharedState
-        if isinstance(result_state, dict):
-            session.shared_state = SharedState(**result_state)
+        # Check if this run was interrupted by comparing run IDs before touching
+        # the result at all. If current_run_id changed, this run is stale and
+        # its output is dropped without rebuilding or serializing anything.
+        result_is_dict = isinstance(result_state, dict)
+        result_run_id = result_state.get("current_run_id") if result_is_dict else result_state.current_run_id
+        if result_run_id != request_id:
+            logger.debug("[Background] Run %s was superseded by %s, skipping broadcast", request_id, result_run_id)
+            return
+        
+        # LangGraph returns a dict of already-validated values, so rebuild
+        # SharedState without re-validating every nested result/turn
+        if result_is_dict:
+            for key, model in (("flight_results", FlightResult), ("hotel_results", HotelResult)):
+                items = result_state.get(key)
+                if items and isinstance(items[0], dict):
+                    result_state[key] = [model.model_construct(**item) for item in items]
+            session.shared_state = SharedState.model_construct(**result_state)
         else:
             session.shared_state = result_state
         
-        # Check if this run was interrupted by comparing run IDs
-        # If current_run_id changed, this run is stale
-        if session.shared_state.current_run_id != request_id:
-            print(f"[Background] Run {request_id} was superseded by {session.shared_state.current_run_id}, skipping broadcast")
-            return
-        
         # Check the interrupted flag as well
         if session.shared_state.is_interrupted:
-            print(f"[Background] Run was interrupted, skipping result broadcast")
+            logger.debug("[Background] Run was interrupted, skipping result broadcast")
             await manager.send_json(session_id, {
                 "type": "status",
                 "status": "cancelled",
@@ -195,17 +378,20 @@ async def run_graph_background(session_id: str, request_id: str):
             })
             return
         
+        # End-of-run events are coalesced into a single "batch" frame
+        events: List[dict] = []
+        
         # Get the latest assistant response from conversation history
-        assistant_messages = [
-            turn for turn in session.shared_state.conversation_history 
-            if turn.sender == "assistant"
-        ]
+        # (scan from the end; it is almost always the last turn)
+        latest_response = next(
+            (turn for turn in reversed(session.shared_state.conversation_history)
+             if turn.sender == "assistant"),
+            None
+        )
         
-        if assistant_messages:
-            latest_response = assistant_messages[-1]
-            
+        if latest_response:
             # Broadcast assistant response
-            await manager.send_json(session_id, {
+            events.append({
                 "type": "message",
                 "sender": "assistant",
                 "text": latest_response.text,
@@ -220,46 +406,51 @@ async def run_graph_background(session_id: str, request_id: str):
             if current_intent in [Intent.FLIGHT, Intent.COMBINED]:
                 # Show flights
                 if session.shared_state.flight_results:
-                    print(f"[WebSocket] Sending {len(session.shared_state.flight_results)} flight results")
-                    await manager.send_json(session_id, {
+                    logger.debug("[WebSocket] Sending %s flight results", len(session.shared_state.flight_results))
+                    events.append({
                         "type": "flight_results",
-                        "results": [f.model_dump() for f in session.shared_state.flight_results],
+                        "results": results_json(session.shared_state.flight_results),
                         "session_id": session_id
                     })
-            else:
-                # Explicitly hide flights when NOT in flight/combined intent
-                print(f"[WebSocket] Clearing flight results (intent={current_intent.value})")
-                await manager.send_json(session_id, {
+                    session.last_flight_count = len(session.shared_state.flight_results)
+            elif session.last_flight_count:
+                # Explicitly hide flights when NOT in flight/combined intent (skipped if already clear)
+                logger.debug("[WebSocket] Clearing flight results (intent=%s)", current_intent.value)
+                events.append({
                     "type": "flight_results",
                     "results": [],
                     "session_id": session_id
                 })
+                session.last_flight_count = 0
             
             # Handle Hotel Results
             if current_intent in [Intent.HOTEL, Intent.COMBINED]:
                 # Show hotels
                 if session.shared_state.hotel_results:
-                    print(f"[WebSocket] Sending {len(session.shared_state.hotel_results)} hotel results")
-                    await manager.send_json(session_id, {
+                    logger.debug("[WebSocket] Sending %s hotel results", len(session.shared_state.hotel_results))
+                    events.append({
                         "type": "hotel_results",
-                        "results": [h.model_dump() for h in session.shared_state.hotel_results],
+                        "results": results_json(session.shared_state.hotel_results),
                         "session_id": session_id
                     })
-            else:
-                # Explicitly hide hotels when NOT in hotel/combined intent
-                print(f"[WebSocket] Clearing hotel results (intent={current_intent.value})")
-                await manager.send_json(session_id, {
+                    session.last_hotel_count = len(session.shared_state.hotel_results)
+            elif session.last_hotel_count:
+                # Explicitly hide hotels when NOT in hotel/combined intent (skipped if already clear)
+                logger.debug("[WebSocket] Clearing hotel results (intent=%s)", current_intent.value)
+                events.append({
                     "type": "hotel_results",
                     "results": [],
                     "session_id": session_id
                 })
+                session.last_hotel_count = 0
             
             # Broadcast preference updates if new preferences were learned
-            if session.shared_state.user_preferences.preference_items:
-                latest_pref = session.shared_state.user_preferences.preference_items[-1]
-                # Check if this preference was just added (within last 2 seconds)
-                if time.time() - latest_pref.timestamp < 2:
-                    await manager.send_json(session_id, {
+            prefs = session.shared_state.user_preferences
+            if prefs.newly_added:
+                prefs.newly_added = False
+                if prefs.preference_items:
+                    latest_pref = prefs.preference_items[-1]
+                    events.append({
                         "type": "preference_update",
                         "preference": {
                             "category": latest_pref.category,
@@ -267,21 +458,45 @@ async def run_graph_background(session_id: str, request_id: str):
                         },
                         "session_id": session_id
                     })
-                    print(f"[Preferences] Broadcasted new preference: {latest_pref.category}={latest_pref.value}")
+                    logger.debug("[Preferences] Broadcasted new preference: %s=%s", latest_pref.category, latest_pref.value)
                 
             # Note: For Intent.OTHER or Intent.REFINE, we do not send empty lists.
             # This allows the frontend to preserve its current state (e.g. showing results while asking questions),
             # or respect the user's manual clearing (e.g. after clicking "Select").
         
-        # Send completion status
-        await manager.send_json(session_id, {
+        # Completion status closes the batch
+        events.append({
             "type": "status",
             "status": "completed",
             "session_id": session_id
         })
         
+        await manager.send_json(session_id, {
+            "type": "batch",
+            "events": events,
+            "session_id": session_id
+        })
+        t3 = time.perf_counter_ns()
+        
+        timings = {
+            "compress_ns": t1 - t0,
+            "invoke_ns": t2 - t1,
+            "broadcast_ns": t3 - t2,
+            "n_flights": len(session.shared_state.flight_results),
+            "n_hotels": len(session.shared_state.hotel_results),
+        }
+        logger.info(
+            "[Background] Run timings for %s: compress=%.1fms invoke=%.1fms broadcast=%.1fms",
+            session_id, timings["compress_ns"] / 1e6, timings["invoke_ns"] / 1e6, timings["broadcast_ns"] / 1e6,
+            extra=timings,
+        )
+        
+        # Persist metadata-only checkpoint after the broadcast, off the event loop
+        if CHECKPOINT_DIR:
+            await asyncio.to_thread(save_checkpoint, CHECKPOINT_DIR, session_id, session.shared_state)
+        
     except asyncio.CancelledError:
-        print(f"[Background] Run cancelled for session {session_id}")
+        logger.info("[Background] Run cancelled for session %s", session_id)
         await manager.send_json(session_id, {
             "type": "status",
             "status": "cancelled",
@@ -291,23 +506,19 @@ async def run_graph_background(session_id: str, request_id: str):
         raise
         
     except Exception as e:
-        print(f"[Background] Error executing graph: {e}")
+        logger.exception("[Background] Error executing graph")
         await manager.send_json(session_id, {
             "type": "error",
             "error": str(e),
             "session_id": session_id
         })
     finally:
-        # Cleanup active run
-        if session_id in active_runs:
-            del active_runs[session_id]
-        if session_id in active_tasks:
-            del active_tasks[session_id]
-        print(f"[Background] Run finished for session {session_id}")
+        # Registry cleanup happens in _on_run_done
+        logger.debug("[Background] Run finished for session %s", session_id)
 
 
-@app.post("/chat/{session_id}/message")
-async def post_message(session_id: str, payload: MessageIn):
+@app.post("/chat/{session_id}/message", status_code=202)
+async def post_message(session_id: str, payload: MessageIn) -> MessageAccepted:
     """
     Receive a user message and queue agent orchestration.
     
@@ -320,14 +531,21 @@ async def post_message(session_id: str, payload: MessageIn):
     # Get or create session
     session = get_or_create_session(session_id)
     
-    # Create conversation turn for user message
-    user_turn = ConversationTurn(
+    # Read the clocks once for this request
+    now = time.time()
+    now_ns = time.monotonic_ns()
+    
+    # Create conversation turn for user message (payload is already validated)
+    user_turn = ConversationTurn.model_construct(
         sender="user",
         text=payload.message,
-        timestamp=time.time()
+        timestamp=now,
+        mono_ns=now_ns
     )
     session.history.append(user_turn)
-    session.shared_state.conversation_history.append(user_turn)
+    append_turn(session.shared_state, user_turn)
+    session.shared_state.last_user_message = user_turn.text
+    session.shared_state.user_turn_count += 1
     
     # Generate request ID for tracking
     request_id = uuid.uuid4().hex
@@ -341,9 +559,9 @@ async def post_message(session_id: str, payload: MessageIn):
         "request_id": request_id
     })
     
-    # Check for active run and handle interruption
-    if session_id in active_runs:
-        print(f"[Interruption] Active run found for session {session_id}. Cancelling previous run.")
+    # Check for active run and handle interruption (popped; replaced by the new run below)
+    if active_runs.pop(session_id, None) is not None:
+        logger.info("[Interruption] Active run found for session %s. Cancelling previous run.", session_id)
         
         # Mark the session state as interrupted
         session.shared_state.is_interrupted = True
@@ -368,19 +586,20 @@ async def post_message(session_id: str, payload: MessageIn):
         })
         
         # Cancel the existing task
-        if session_id in active_tasks:
-            existing_task = active_tasks[session_id]
+        existing_task = active_tasks.pop(session_id, None)
+        if existing_task is not None:
             existing_task.cancel()
             
-            # Wait for cancellation to complete (with timeout)
+            # Wait for cancellation to complete (with timeout). Shielded so that
+            # this request being cancelled doesn't abandon the wait half-way.
             try:
-                await asyncio.wait_for(existing_task, timeout=2.0)
+                await asyncio.shield(asyncio.wait_for(existing_task, timeout=2.0))
             except asyncio.CancelledError:
-                print(f"[Interruption] Previous task cancelled successfully")
+                logger.debug("[Interruption] Previous task cancelled successfully")
             except asyncio.TimeoutError:
-                print(f"[Interruption] Timeout waiting for task cancellation")
+                logger.warning("[Interruption] Timeout waiting for task cancellation")
             except Exception as e:
-                print(f"[Interruption] Error during cancellation: {e}")
+                logger.warning("[Interruption] Error during cancellation: %s", e)
     
     # Reset interruption flag for new run
     session.shared_state.is_interrupted = False
@@ -388,10 +607,10 @@ async def post_message(session_id: str, payload: MessageIn):
     
     # Create new active run metadata
     run_id = uuid.uuid4().hex
-    active_run = ActiveRun(
+    active_run = ActiveRun.model_construct(
         run_id=run_id,
         agent_type=AgentType.COORDINATOR, # Initial agent
-        started_at=time.time(),
+        started_at=now,
         session_id=session_id
     )
     active_runs[session_id] = active_run
@@ -399,30 +618,29 @@ async def post_message(session_id: str, payload: MessageIn):
     # Start background task
     task = asyncio.create_task(run_graph_background(session_id, request_id))
     active_tasks[session_id] = task
+    background_tasks.add(task)
+    task.add_done_callback(functools.partial(_on_run_done, session_id))
     
-    # Return 202 Accepted
-    return Response(
-        content='{"status": "accepted", "session_id": "' + session_id + '", "request_id": "' + request_id + '"}',
-        media_type="application/json"
-    )
+    # Return 202 Accepted (serialized by pydantic-core via the return annotation)
+    return MessageAccepted(session_id=session_id, request_id=request_id)
 
 
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     """WebSocket endpoint for real-time updates per session."""
     await manager.connect(session_id, websocket)
-    print(f"WebSocket connected for session {session_id}")
+    logger.info("WebSocket connected for session %s", session_id)
     try:
         while True:
             data = await websocket.receive_text()
-            print(f"Received WebSocket message from {session_id}: {data}")
+            logger.debug("Received WebSocket message from %s: %s", session_id, data)
             await websocket.send_json({
                 "type": "echo",
                 "data": data,
             })
     except WebSocketDisconnect:
         manager.disconnect(session_id, websocket)
-        print(f"WebSocket disconnected for session {session_id}")
+        logger.info("WebSocket disconnected for session %s", session_id)
 
 
 @app.get("/chat/{session_id}/stream")
@@ -446,28 +664,40 @@ async def get_conversation_history(session_id: str):
         JSON with conversation history and summaries
     """
     session = get_or_create_session(session_id)
+    history = session.shared_state.conversation_history
+    summaries = session.shared_state.conversation_summaries
+    
+    # Turns and summaries are append-only objects, so the list lengths plus the
+    # identity of the last entries change whenever the content does
+    cache_key = (
+        len(history), id(history[-1]) if history else None,
+        len(summaries), id(summaries[-1]) if summaries else None,
+    )
+    if session._history_cache is None or session._history_cache_key != cache_key:
+        session._history_cache = orjson.dumps({
+            "session_id": session_id,
+            "conversation_history": [
+                {
+                    "sender": turn.sender,
+                    "text": turn.text,
+                    "timestamp": turn.timestamp,
+                    "run_id": turn.run_id
+                }
+                for turn in history
+            ],
+            "conversation_summaries": [
+                {
+                    "summary": summary.summary_text,
+                    "turn_count": summary.turn_count,
+                    "start_timestamp": summary.start_timestamp,
+                    "end_timestamp": summary.end_timestamp
+                }
+                for summary in summaries
+            ]
+        })
+        session._history_cache_key = cache_key
     
-    return {
-        "session_id": session_id,
-        "conversation_history": [
-            {
-                "sender": turn.sender,
-                "text": turn.text,
-                "timestamp": turn.timestamp,
-                "run_id": turn.run_id
-            }
-            for turn in session.shared_state.conversation_history
-        ],
-        "conversation_summaries": [
-            {
-                "summary": summary.summary,
-                "turn_count": summary.turn_count,
-                "start_timestamp": summary.start_timestamp,
-                "end_timestamp": summary.end_timestamp
-            }
-            for summary in session.shared_state.conversation_summaries
-        ]
-    }
+    return Response(content=session._history_cache, media_type="application/json")
 
 
 @app.get("/chat/{session_id}/preferences")
@@ -593,9 +823,9 @@ class BookingRequest(BaseModel):
     """Request to complete a booking."""
     flight_id: Optional[str] = None
     hotel_id: Optional[str] = None
-    passenger_info: Dict[str, str]  # {first_name, last_name, email, phone}
+    passenger_info: PassengerInfo
     seat: Optional[str] = None
-    payment_info: Dict[str, str]  # Mock payment details
+    payment_info: PaymentInfo  # Mock payment details
     # Hotel-specific fields
     room_type: Optional[str] = None
     check_in: Optional[str] = None
@@ -624,19 +854,19 @@ async def complete_booking(session_id: str, booking: BookingRequest):
     flight_data = None
     hotel_data = None
     
+    state = session.shared_state
+    
     if booking.flight_id:
-        # Find flight in results
-        for flight in session.shared_state.flight_results:
-            if flight.id == booking.flight_id:
-                flight_data = flight.model_dump()
-                break
+        # Look up flight in results by id
+        flight = _result_by_id(state.flight_results, state.flight_index, booking.flight_id)
+        if flight is not None:
+            flight_data = flight.model_dump()
     
     if booking.hotel_id:
-        # Find hotel in results
-        for hotel in session.shared_state.hotel_results:
-            if hotel.id == booking.hotel_id:
-                hotel_data = hotel.model_dump()
-                break
+        # Look up hotel in results by id
+        hotel = _result_by_id(state.hotel_results, state.hotel_index, booking.hotel_id)
+        if hotel is not None:
+            hotel_data = hotel.model_dump()
     
     # Generate itinerary HTML
     from .services.booking_service import generate_itinerary_html, send_mock_email
@@ -664,9 +894,7 @@ async def complete_booking(session_id: str, booking: BookingRequest):
     itinerary_html = generate_itinerary_html(booking_details)
     
     # Send mock email
-    passenger_email = "user@example.com"
-    if booking.passenger_info:
-        passenger_email = booking.passenger_info.get("email", "user@example.com")
+    passenger_email = booking.passenger_info.email or "user@example.com"
     
     send_mock_email(
         to_email=passenger_email,
@@ -698,28 +926,33 @@ async def transcribe_audio_endpoint(file: UploadFile = File(...)):
     """
     Transcribe uploaded audio file using Gemini.
     """
-    print(f"[Transcribe] Received audio file: {file.filename}, content_type: {file.content_type}")
+    logger.debug("[Transcribe] Received audio file: %s, content_type: %s", file.filename, file.content_type)
     try:
         contents = await file.read()
-        print(f"[Transcribe] Read {len(contents)} bytes")
+        logger.debug("[Transcribe] Read %s bytes", len(contents))
         
         # Import llm module
         from . import llm
         
         transcript = llm.transcribe_audio(contents)
-        print(f"[Transcribe] Result: {transcript[:100]}...")
+        logger.debug("[Transcribe] Result: %s...", transcript[:100])
         
         if transcript.startswith("Error"):
             raise HTTPException(status_code=500, detail=transcript)
             
         return {"text": transcript}
     except Exception as e:
-        print(f"[Transcribe] Error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[Transcribe] Error")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Prefer uvloop for the async-heavy graph execution; stdlib loop otherwise
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop=loop)
@@ -5,16 +5,18 @@ This module contains:
 - Conversation models (ConversationTurn)
 - Search parameter models (FlightSearchParams, HotelSearchParams)
 - Result models (FlightResult, HotelResult)
+- Booking models (PassengerInfo, PaymentInfo)
 - LangGraph SharedState model
 - Active run tracking models
 """
 
 import asyncio
+import itertools
+import sys
 import time
-from datetime import datetime
 from enum import Enum
-from typing import List, Optional, Union, Dict, Any
-from pydantic import BaseModel, Field
+from typing import Annotated, List, Optional, Union, Dict, Any
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, PrivateAttr, TypeAdapter, field_validator
 
 
 # ============================================================================
@@ -45,7 +47,8 @@ class ConversationTurn(BaseModel):
     """Represents a single turn in the conversation."""
     sender: str  # "user" | "assistant" | "system"
     text: str
-    timestamp: float
+    timestamp: float  # Wall clock (UNIX seconds), for display
+    mono_ns: Optional[int] = None  # time.monotonic_ns(), for ordering/latency math
     run_id: Optional[str] = None
 
 
@@ -55,7 +58,7 @@ class ConversationSummary(BaseModel):
     turn_count: int  # Number of turns summarized
     start_timestamp: float
     end_timestamp: float
-    created_at: float = Field(default_factory=lambda: datetime.now().timestamp())
+    created_at: float = Field(default_factory=time.time)
 
 
 class PreferenceItem(BaseModel):
@@ -64,29 +67,40 @@ class PreferenceItem(BaseModel):
     value: str  # "morning", "business", "4-star", etc.
     confidence: float = 1.0  # 0.0 to 1.0
     source_message: Optional[str] = None  # Original message that revealed this preference
-    timestamp: float = Field(default_factory=lambda: time.time())
+    timestamp: float = Field(default_factory=time.time)
     applied_count: int = 0  # How many times this preference was used
 
 
+# Only the most recent preference items are kept; older ones have already
+# been folded into the top-level fields below.
+MAX_PREFERENCE_ITEMS = 256
+
+
 class UserPreferences(BaseModel):
     """Collection of learned user preferences."""
     # Flight preferences
     preferred_flight_time: Optional[str] = None  # "morning", "afternoon", "evening"
     preferred_cabin_class: Optional[str] = None  # "economy", "business", "first"
-    preferred_airlines: List[str] = []  # List of preferred airlines
+    preferred_airlines: List[str] = Field(default_factory=list)  # List of preferred airlines
     max_stops: Optional[int] = None  # Maximum acceptable stops
     
     # Hotel preferences
     min_hotel_rating: Optional[float] = None  # Minimum star rating
     preferred_hotel_budget: Optional[str] = None  # "budget", "mid", "luxury"
-    preferred_amenities: List[str] = []  # Wifi, Pool, Gym, etc.
+    preferred_amenities: List[str] = Field(default_factory=list)  # Wifi, Pool, Gym, etc.
     
     # General preferences
     preferred_budget_range: Optional[str] = None  # "under_500", "500_1000", "luxury"
     
     # Metadata
-    preference_items: List[PreferenceItem] = []  # Detailed tracking
+    preference_items: List[PreferenceItem] = Field(default_factory=list)  # Detailed tracking (last MAX_PREFERENCE_ITEMS)
     last_updated: Optional[float] = None
+    newly_added: bool = False  # Set when the current turn learned something; reset after broadcast
+    
+    @field_validator("preference_items")
+    @classmethod
+    def _trim_preference_items(cls, items: List[PreferenceItem]) -> List[PreferenceItem]:
+        return items[-MAX_PREFERENCE_ITEMS:]
 
 
 # ============================================================================
@@ -143,12 +157,42 @@ class HotelSearchParams(BaseModel):
 # Result Models
 # ============================================================================
 
+class CachedJSONModel(BaseModel):
+    """
+    Base for result models that are never mutated after creation.
+    
+    Their JSON encoding is computed once and reused for every broadcast.
+    """
+    _json_cache: Optional[bytes] = PrivateAttr(default=None)
+    
+    def dumped_json(self) -> bytes:
+        """Return this model's JSON encoding, serializing on first use."""
+        if self._json_cache is None:
+            self._json_cache = self.__pydantic_serializer__.to_json(self)
+        return self._json_cache
+
+
+def _intern(value: str) -> str:
+    """Intern low-cardinality strings so repeated values share one object."""
+    return sys.intern(value)
+
+
+# Enum-like string fields (airline, currency, cities, ...) repeat across every
+# cached result; interning keeps a single copy of each distinct value.
+InternedStr = Annotated[str, AfterValidator(_intern)]
+
+
+# Default result ids: wall-clock ns plus a process-wide counter, so ids created
+# within the same clock tick stay unique
+_result_ids = itertools.count()
+
+
 class FlightSegment(BaseModel):
     """Represents a single leg/segment of a multi-leg flight."""
-    airline: str
+    airline: InternedStr
     flight_number: Optional[str] = None
-    origin: str
-    destination: str
+    origin: InternedStr
+    destination: InternedStr
     departure_time: str  # ISO format datetime
     arrival_time: str  # ISO format datetime
     duration_minutes: int
@@ -157,20 +201,20 @@ class FlightSegment(BaseModel):
     aircraft: Optional[str] = None  # e.g., "Boeing 737"
 
 
-class FlightResult(BaseModel):
+class FlightResult(CachedJSONModel):
     """Represents a single flight option (can be multi-leg)."""
-    id: str = Field(default_factory=lambda: f"flight_{datetime.now().timestamp()}")
-    airline: str
+    id: str = Field(default_factory=lambda: f"flight_{time.time_ns()}_{next(_result_ids)}")
+    airline: InternedStr
     flight_number: Optional[str] = None
-    origin: str
-    destination: str
+    origin: InternedStr
+    destination: InternedStr
     departure_time: str  # ISO format datetime
     arrival_time: str  # ISO format datetime
     duration_minutes: int
     stops: int = 0
     price: float
-    currency: str = "USD"
-    cabin_class: str = "economy"
+    currency: InternedStr = "USD"
+    cabin_class: InternedStr = "economy"
     booking_link: Optional[str] = None
     is_partial: bool = False  # Indicates if from interrupted run
     origin_coordinates: Optional[List[float]] = None  # [lat, lon]
@@ -204,17 +248,17 @@ class FlightResult(BaseModel):
         }
 
 
-class HotelResult(BaseModel):
+class HotelResult(CachedJSONModel):
     """Represents a single hotel option."""
-    id: str = Field(default_factory=lambda: f"hotel_{datetime.now().timestamp()}")
+    id: str = Field(default_factory=lambda: f"hotel_{time.time_ns()}_{next(_result_ids)}")
     name: str
-    city: str
+    city: InternedStr
     address: Optional[str] = None
     star_rating: Optional[float] = None
     review_score: Optional[float] = None
     review_count: Optional[int] = None  # Number of reviews
     price_per_night: float
-    currency: str = "USD"
+    currency: InternedStr = "USD"
     total_price: Optional[float] = None
     amenities: List[str] = []
     image_url: Optional[str] = None
@@ -239,6 +283,35 @@ class HotelResult(BaseModel):
         }
 
 
+# Batch validators/serializers for result lists (one pydantic-core call per list)
+FlightResultListAdapter = TypeAdapter(List[FlightResult])
+HotelResultListAdapter = TypeAdapter(List[HotelResult])
+
+
+# ============================================================================
+# Booking Models
+# ============================================================================
+
+class PassengerInfo(BaseModel):
+    """Passenger/guest contact details for a booking."""
+    model_config = ConfigDict(extra="forbid")  # Reject misspelled/unknown keys from the client
+    
+    first_name: str = ""
+    last_name: str = ""
+    email: str = ""
+    phone: str = ""
+
+
+class PaymentInfo(BaseModel):
+    """Mock payment details for a booking."""
+    model_config = ConfigDict(extra="forbid")
+    
+    card_number: str = ""
+    expiry: str = ""
+    cvv: str = ""
+    name: str = ""
+
+
 # ============================================================================
 # LangGraph Shared State
 # ============================================================================
@@ -258,11 +331,15 @@ class SharedState(BaseModel):
     """
     # Conversation context
     session_id: Optional[str] = None
-    conversation_history: List[ConversationTurn] = []
-    conversation_summaries: List[ConversationSummary] = []  # Summarized older conversations
+    conversation_history: List[ConversationTurn] = Field(default_factory=list)
+    conversation_summaries: List[ConversationSummary] = Field(default_factory=list)  # Summarized older conversations
+    last_user_message: Optional[str] = None  # Updated whenever a user turn is appended
+    user_turn_count: int = 0  # Total user turns (including summarized ones)
+    approx_tokens: int = 0  # Rough token estimate of conversation_history (~4 chars/token), kept on append
     
     # User preferences (learned)
-    user_preferences: UserPreferences = UserPreferences()
+    user_preferences: UserPreferences = Field(default_factory=UserPreferences)
+    preferences_turn: int = 0  # user_turn_count when preferences were last extracted
     
     # Intent and routing
     current_intent: Intent = Intent.OTHER
@@ -272,12 +349,24 @@ class SharedState(BaseModel):
     hotel_params: Optional[HotelSearchParams] = None
     
     # Results
-    flight_results: List[FlightResult] = []
-    hotel_results: List[HotelResult] = []
+    flight_results: List[FlightResult] = Field(default_factory=list)
+    hotel_results: List[HotelResult] = Field(default_factory=list)
+    
+    # Result versions (bumped on every new search) and cached JSON dumps
+    flight_results_version: int = 0
+    hotel_results_version: int = 0
+    flight_results_dump: Optional[List[Dict[str, Any]]] = None
+    flight_results_dump_version: int = -1
+    hotel_results_dump: Optional[List[Dict[str, Any]]] = None
+    hotel_results_dump_version: int = -1
+    
+    # Result id -> list position, rebuilt whenever a search replaces the results
+    flight_index: Dict[str, int] = Field(default_factory=dict)
+    hotel_index: Dict[str, int] = Field(default_factory=dict)
     
     # Agent metadata
     last_agent: Optional[AgentType] = None
-    interrupted_run_ids: List[str] = []
+    interrupted_run_ids: List[str] = Field(default_factory=list)
     
     # Interruption control
     is_interrupted: bool = False
@@ -294,9 +383,9 @@ class SharedState(BaseModel):
     pending_hotel_booking: Optional[str] = None
     
     # Booking details (for checkout flow)
-    booking_passenger_info: Optional[Dict[str, Any]] = None  # {first_name, last_name, email, phone}
+    booking_passenger_info: Optional[PassengerInfo] = None
     booking_seat: Optional[str] = None  # e.g., "12A"
-    booking_payment_info: Optional[Dict[str, Any]] = None  # Mock payment details
+    booking_payment_info: Optional[PaymentInfo] = None  # Mock payment details
     confirmed_booking_reference: Optional[str] = None  # Generated after "payment"
     
     class Config:
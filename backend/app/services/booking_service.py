@@ -3,31 +3,17 @@ Booking Service for generating itineraries and handling mock notifications.
 """
 import logging
 from datetime import datetime
-from typing import Dict, Any
+from string import Formatter
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from ..models import PassengerInfo
 
 logger = logging.getLogger(__name__)
 
-def generate_itinerary_html(booking_details: Dict[str, Any]) -> str:
-    """
-    Generate a beautiful HTML itinerary for the booking.
-    Supports both flight and hotel bookings.
-    """
-    flight = booking_details.get("flight")
-    hotel = booking_details.get("hotel")
-    passenger = booking_details.get("passenger", {})
-    seat = booking_details.get("seat", "Any")
-    booking_ref = booking_details.get("booking_reference", "Unknown")
-    room_type = booking_details.get("room_type", "Standard")
-    check_in = booking_details.get("check_in", "")
-    check_out = booking_details.get("check_out", "")
-    guests = booking_details.get("guests", "1")
-    
-    # Determine if it's a flight or hotel booking
-    is_flight = flight is not None
-    
-    if is_flight:
-        # Flight booking HTML
-        html = f"""
+# Itinerary templates, parsed once at import into (literal, field) parts so
+# rendering only interleaves the constant HTML/CSS with a few per-booking
+# values ({{ }} are literal CSS braces).
+_FLIGHT_TEMPLATE = """
         <!DOCTYPE html>
         <html>
         <head>
@@ -61,12 +47,12 @@ def generate_itinerary_html(booking_details: Dict[str, Any]) -> str:
                 <div class="content">
                     <div class="flight-route">
                         <div class="airport">
-                            <span class="code">{flight.get('origin', '???')}</span>
+                            <span class="code">{origin}</span>
                             <span class="city">Origin</span>
                         </div>
                         <div class="plane-icon">✈</div>
                         <div class="airport">
-                            <span class="code">{flight.get('destination', '???')}</span>
+                            <span class="code">{destination}</span>
                             <span class="city">Destination</span>
                         </div>
                     </div>
@@ -74,19 +60,19 @@ def generate_itinerary_html(booking_details: Dict[str, Any]) -> str:
                     <div class="details-grid">
                         <div class="detail-item">
                             <label>Passenger</label>
-                            <span>{passenger.get('first_name', '')} {passenger.get('last_name', '')}</span>
+                            <span>{passenger_name}</span>
                         </div>
                         <div class="detail-item">
                             <label>Flight</label>
-                            <span>{flight.get('airline', '')} {flight.get('flight_number', '')}</span>
+                            <span>{flight_label}</span>
                         </div>
                         <div class="detail-item">
                             <label>Date</label>
-                            <span>{flight.get('departure_time', '').split('T')[0]}</span>
+                            <span>{depart_date}</span>
                         </div>
                         <div class="detail-item">
                             <label>Time</label>
-                            <span>{flight.get('departure_time', '').split('T')[1][:5]}</span>
+                            <span>{depart_time}</span>
                         </div>
                         <div class="detail-item">
                             <label>Seat</label>
@@ -94,7 +80,7 @@ def generate_itinerary_html(booking_details: Dict[str, Any]) -> str:
                         </div>
                         <div class="detail-item">
                             <label>Class</label>
-                            <span>{flight.get('cabin_class', 'Economy').title()}</span>
+                            <span>{cabin_class}</span>
                         </div>
                     </div>
                     
@@ -102,15 +88,14 @@ def generate_itinerary_html(booking_details: Dict[str, Any]) -> str:
                 </div>
                 <div class="footer">
                     <p>Thank you for choosing Travel Assistant. Have a safe flight!</p>
-                    <p>Generated on {datetime.now().strftime('%Y-%m-%d %H:%M')}</p>
+                    <p>Generated on {generated_on}</p>
                 </div>
             </div>
         </body>
         </html>
         """
-    else:
-        # Hotel booking HTML
-        html = f"""
+
+_HOTEL_TEMPLATE = """
         <!DOCTYPE html>
         <html>
         <head>
@@ -142,14 +127,14 @@ def generate_itinerary_html(booking_details: Dict[str, Any]) -> str:
                 </div>
                 <div class="content">
                     <div class="hotel-info">
-                        <div class="hotel-name">{hotel.get('name', 'Hotel') if hotel else 'Hotel'}</div>
-                        <div class="hotel-city">{hotel.get('city', '') if hotel else ''}</div>
+                        <div class="hotel-name">{hotel_name}</div>
+                        <div class="hotel-city">{hotel_city}</div>
                     </div>
                     
                     <div class="details-grid">
                         <div class="detail-item">
                             <label>Guest Name</label>
-                            <span>{passenger.get('first_name', '')} {passenger.get('last_name', '')}</span>
+                            <span>{passenger_name}</span>
                         </div>
                         <div class="detail-item">
                             <label>Room Type</label>
@@ -169,7 +154,7 @@ def generate_itinerary_html(booking_details: Dict[str, Any]) -> str:
                         </div>
                         <div class="detail-item">
                             <label>Email</label>
-                            <span>{passenger.get('email', '')}</span>
+                            <span>{email}</span>
                         </div>
                     </div>
                     
@@ -177,14 +162,85 @@ def generate_itinerary_html(booking_details: Dict[str, Any]) -> str:
                 </div>
                 <div class="footer">
                     <p>Thank you for choosing Travel Assistant. Enjoy your stay!</p>
-                    <p>Generated on {datetime.now().strftime('%Y-%m-%d %H:%M')}</p>
+                    <p>Generated on {generated_on}</p>
                 </div>
             </div>
         </body>
         </html>
         """
+
+def _parse_template(template: str) -> List[Tuple[str, Optional[str]]]:
+    """Split a format-string template into (literal text, field name or None) parts."""
+    return [(literal, field) for literal, field, _spec, _conv in Formatter().parse(template)]
+
+
+_FLIGHT_PARTS = _parse_template(_FLIGHT_TEMPLATE)
+_HOTEL_PARTS = _parse_template(_HOTEL_TEMPLATE)
+
+
+def _itinerary_values(booking_details: Dict[str, Any]) -> Tuple[List[Tuple[str, Optional[str]]], Dict[str, Any]]:
+    """Pick the itinerary template for a booking and compute its placeholder values."""
+    flight = booking_details.get("flight")
+    hotel = booking_details.get("hotel")
+    passenger = booking_details.get("passenger") or PassengerInfo()
+    
+    values = {
+        "booking_ref": booking_details.get("booking_reference", "Unknown"),
+        "passenger_name": f"{passenger.first_name} {passenger.last_name}",
+        "generated_on": datetime.now().strftime('%Y-%m-%d %H:%M'),
+    }
+    
+    # Determine if it's a flight or hotel booking
+    is_flight = flight is not None
+    
+    if is_flight:
+        # Flight booking HTML
+        departure_time = flight.get('departure_time', '')
+        values.update(
+            origin=flight.get('origin', '???'),
+            destination=flight.get('destination', '???'),
+            flight_label=f"{flight.get('airline', '')} {flight.get('flight_number', '')}",
+            depart_date=departure_time.split('T')[0],
+            depart_time=departure_time.split('T')[1][:5],
+            seat=booking_details.get("seat", "Any"),
+            cabin_class=flight.get('cabin_class', 'Economy').title(),
+        )
+        return _FLIGHT_PARTS, values
+    
+    # Hotel booking HTML
+    values.update(
+        hotel_name=hotel.get('name', 'Hotel') if hotel else 'Hotel',
+        hotel_city=hotel.get('city', '') if hotel else '',
+        room_type=booking_details.get("room_type", "Standard"),
+        check_in=booking_details.get("check_in", ""),
+        check_out=booking_details.get("check_out", ""),
+        guests=booking_details.get("guests", "1"),
+        email=passenger.email,
+    )
+    return _HOTEL_PARTS, values
+
+
+def iter_itinerary_chunks(booking_details: Dict[str, Any]) -> Iterator[str]:
+    """
+    Yield the itinerary HTML piece by piece.
     
-    return html
+    Constant header/CSS/footer text is yielded as-is, so the output can be
+    written to a socket or file without building the whole document first.
+    """
+    parts, values = _itinerary_values(booking_details)
+    for literal, field in parts:
+        if literal:
+            yield literal
+        if field is not None:
+            yield str(values[field])
+
+
+def generate_itinerary_html(booking_details: Dict[str, Any]) -> str:
+    """
+    Generate a beautiful HTML itinerary for the booking.
+    Supports both flight and hotel bookings.
+    """
+    return "".join(iter_itinerary_chunks(booking_details))
 
 def send_mock_email(to_email: str, subject: str, body: str):
     """
@@ -0,0 +1,141 @@
+"""
+Session Checkpoint Service.
+
+Persists a metadata-only snapshot of a session: turn hashes, senders and
+timestamps plus the conversation summaries. Raw turn text stays in memory
+(and on the client), so checkpoints stay small regardless of history length.
+A session re-created after a restart gets its summaries and turn count back.
+"""
+
+import hashlib
+import logging
+import os
+from typing import Any, Dict, Optional
+
+import orjson
+
+from ..models import ConversationSummary, ConversationTurn, SharedState
+
+logger = logging.getLogger(__name__)
+
+
+def turn_hash(turn: ConversationTurn) -> str:
+    """
+    Content hash of a turn's text, used to match it against a client-held copy.
+    
+    Args:
+        turn: Conversation turn
+    
+    Returns:
+        Hex digest of the turn text
+    """
+    return hashlib.blake2b(turn.text.encode(), digest_size=8).hexdigest()
+
+
+def checkpoint_metadata(session_id: str, state: SharedState) -> Dict[str, Any]:
+    """
+    Build the metadata-only checkpoint for a session.
+    
+    Args:
+        session_id: Session identifier
+        state: Current shared state
+    
+    Returns:
+        Checkpoint dict (no raw turn text)
+    """
+    return {
+        "session_id": session_id,
+        "user_turn_count": state.user_turn_count,
+        "turns": [
+            (i, turn_hash(turn), turn.sender, turn.timestamp)
+            for i, turn in enumerate(state.conversation_history)
+        ],
+        "summaries": [s.model_dump() for s in state.conversation_summaries],
+    }
+
+
+def checkpoint_path(directory: str, session_id: str) -> str:
+    """
+    Checkpoint file for a session.
+    
+    session_id comes straight from the client, so it is hashed rather than
+    used as a filename (no path traversal, no odd characters).
+    
+    Args:
+        directory: Checkpoint directory
+        session_id: Session identifier
+    
+    Returns:
+        Path of the session's checkpoint file
+    """
+    digest = hashlib.blake2b(session_id.encode(), digest_size=16).hexdigest()
+    return os.path.join(directory, f"{digest}.json")
+
+
+def save_checkpoint(directory: str, session_id: str, state: SharedState) -> str:
+    """
+    Atomically write a session's metadata checkpoint to disk.
+    
+    Writes to a temp file first and swaps it in with os.replace, so a reader
+    never sees a partially written checkpoint.
+    
+    Args:
+        directory: Checkpoint directory (created if missing)
+        session_id: Session identifier
+        state: Current shared state
+    
+    Returns:
+        Path of the written checkpoint
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = checkpoint_path(directory, session_id)
+    tmp_path = f"{path}.tmp"
+    
+    with open(tmp_path, "wb") as f:
+        f.write(orjson.dumps(checkpoint_metadata(session_id, state)))
+    os.replace(tmp_path, path)
+    
+    return path
+
+
+def load_checkpoint(directory: str, session_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a session's metadata checkpoint, if one exists.
+    
+    Args:
+        directory: Checkpoint directory
+        session_id: Session identifier
+    
+    Returns:
+        Checkpoint dict, or None if missing, unreadable or for another session
+    """
+    try:
+        with open(checkpoint_path(directory, session_id), "rb") as f:
+            checkpoint = orjson.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, orjson.JSONDecodeError) as e:
+        logger.warning("Ignoring unreadable checkpoint for session %s: %s", session_id, e)
+        return None
+    
+    if not isinstance(checkpoint, dict) or checkpoint.get("session_id") != session_id:
+        return None
+    return checkpoint
+
+
+def restore_checkpoint(state: SharedState, checkpoint: Dict[str, Any]) -> None:
+    """
+    Restore what a metadata checkpoint carries into a fresh session state.
+    
+    Summaries and the user turn count come back; verbatim turns do not,
+    since only their hashes were saved.
+    
+    Args:
+        state: Shared state of a newly created session
+        checkpoint: Dict returned by load_checkpoint
+    """
+    state.conversation_summaries = [
+        ConversationSummary.model_validate(summary)
+        for summary in checkpoint.get("summaries", [])
+    ]
+    state.user_turn_count = checkpoint.get("user_turn_count", 0)
@@ -1,52 +1,92 @@
 import asyncio
-from typing import Dict, AsyncGenerator, Any
-import json
+from collections import deque
+from typing import Deque, Dict, AsyncGenerator, Any, Tuple
 import logging
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 class EventManager:
     def __init__(self):
-        # Map session_id -> asyncio.Queue
-        self._queues: Dict[str, asyncio.Queue] = {}
+        # Map session_id -> (pending (event_type, encoded SSE frame) pairs,
+        # "events available" flag). Single producer/consumer per session,
+        # so a plain deque needs no lock.
+        self._queues: Dict[str, Tuple[Deque[Tuple[str, bytes]], asyncio.Event]] = {}
+        # Map session_id -> asyncio.Lock (serializes graph runs per session)
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+
+    def get_queue(self, session_id: str) -> Tuple[Deque[Tuple[str, bytes]], asyncio.Event]:
+        """Get or create the event buffer and wake-up flag for a session."""
+        entry = self._queues.get(session_id)
+        if entry is None:
+            entry = self._queues[session_id] = (deque(), asyncio.Event())
+        return entry
+
+    def get_lock(self, session_id: str) -> asyncio.Lock:
+        """Get or create the run lock for a session."""
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = self._session_locks[session_id] = asyncio.Lock()
+        return lock
 
-    def get_queue(self, session_id: str) -> asyncio.Queue:
-        """Get or create an event queue for a session."""
-        if session_id not in self._queues:
-            self._queues[session_id] = asyncio.Queue()
-        return self._queues[session_id]
+    def discard_session(self, session_id: str):
+        """
+        Drop a session's run lock and event buffer when the session goes away.
+        
+        An open stream for the session is sent end_stream so it finishes
+        instead of waiting forever on a buffer nobody will write to again.
+        """
+        self._session_locks.pop(session_id, None)
+        entry = self._queues.pop(session_id, None)
+        if entry is not None:
+            buffer, ready = entry
+            buffer.append(("end_stream", b'data: {"type":"end_stream","data":null}\n\n'))
+            ready.set()
 
     async def emit(self, session_id: str, event_type: str, data: Any):
-        """Emit an event to a session's queue."""
-        if session_id in self._queues:
-            event = {
+        """Emit an event to a session's queue, encoded once as an SSE frame."""
+        entry = self._queues.get(session_id)
+        if entry is not None:
+            buffer, ready = entry
+            frame = b"data: " + orjson.dumps({
                 "type": event_type,
                 "data": data
-            }
-            await self._queues[session_id].put(event)
-            logger.debug(f"Emitted event {event_type} to session {session_id}")
+            }) + b"\n\n"
+            buffer.append((event_type, frame))
+            ready.set()
+            logger.debug("Emitted event %s to session %s", event_type, session_id)
 
-    async def stream(self, session_id: str) -> AsyncGenerator[str, None]:
+    async def stream(self, session_id: str) -> AsyncGenerator[bytes, None]:
         """Yield events from the session's queue as SSE messages."""
-        queue = self.get_queue(session_id)
+        buffer, ready = self.get_queue(session_id)
         
         try:
             while True:
-                # Wait for next event
-                event = await queue.get()
-                
-                # Format as SSE
-                # data: <json_string>\n\n
-                yield f"data: {json.dumps(event)}\n\n"
+                # Wait until at least one event is buffered
+                await ready.wait()
+                ready.clear()
                 
-                queue.task_done()
+                # Drain everything that arrived since the last wake-up into one
+                # chunk of pre-encoded SSE messages (data: <json_string>\n\n each)
+                chunks = []
+                end_stream = False
+                while buffer:
+                    event_type, frame = buffer.popleft()
+                    chunks.append(frame)
+                    
+                    # Special event to close stream if needed (optional)
+                    if event_type == "end_stream":
+                        end_stream = True
+                        break
                 
-                # Special event to close stream if needed (optional)
-                if event["type"] == "end_stream":
+                if chunks:
+                    yield b"".join(chunks)
+                if end_stream:
                     break
                     
         except asyncio.CancelledError:
-            logger.info(f"Stream cancelled for session {session_id}")
+            logger.info("Stream cancelled for session %s", session_id)
             # Cleanup could happen here, but we might want to keep queue for reconnection
             # For now, we'll just exit
             pass
@@ -5,17 +5,143 @@ Extracts and manages user preferences from conversation,
 applying them to future searches.
 """
 
+import functools
+import logging
 import time
-import json
 import re
+from collections import OrderedDict
 from typing import Optional
+
+from typing_extensions import TypedDict
+
 from ..models import (
+    MAX_PREFERENCE_ITEMS,
     UserPreferences, 
     PreferenceItem, 
     FlightSearchParams, 
     HotelSearchParams
 )
-from ..llm import generate_text
+from ..llm import generate_text, parse_json_response
+
+logger = logging.getLogger(__name__)
+
+
+# Pattern-based extraction rules, compiled once at import
+_PREFERENCE_PATTERNS = [
+    # Flight time preferences
+    (r'\b(prefer|like|want|always|usually|taking).*(morning|early morning|dawn|sunrise).*(flight|flights)', ('flight_time', 'morning')),
+    (r'\b(prefer|like|want|always|usually|taking).*(afternoon|midday|lunch).*(flight|flights)', ('flight_time', 'afternoon')),
+    (r'\b(prefer|like|want|always|usually|taking).*(evening|night|late|sunset).*(flight|flights)', ('flight_time', 'evening')),
+    
+    # Cabin class preferences
+    (r'\b(prefer|like|want|always|usually).*(business class|business)', ('cabin_class', 'business')),
+    (r'\b(prefer|like|want|always|usually).*(first class|first)', ('cabin_class', 'first')),
+    (r'\b(prefer|like|want|always|usually).*(economy|coach)', ('cabin_class', 'economy')),
+    
+    # Flight preferences
+    (r'\b(prefer|like|want|only).*(direct flight|nonstop|no stop)', ('max_stops', '0')),
+    (r'\b(don\'t like|hate|avoid|never).*(layover|connection|stop)', ('max_stops', '0')),
+    
+    # Hotel ratings
+    (r'\b(prefer|like|want|always).*(4[ -]star|four[ -]star|4\*)', ('min_hotel_rating', '4.0')),
+    (r'\b(prefer|like|want|always).*(5[ -]star|five[ -]star|5\*|luxury hotel)', ('min_hotel_rating', '5.0')),
+    (r'\b(prefer|like|want|always).*(3[ -]star|three[ -]star|3\*)', ('min_hotel_rating', '3.0')),
+    
+    # Budget preferences
+    (r'\b(prefer|like|want|always).*(budget|cheap|affordable|inexpensive)', ('hotel_budget', 'budget')),
+    (r'\b(prefer|like|want|always).*(luxury|high[ -]end|expensive|premium)', ('hotel_budget', 'luxury')),
+    
+    # Amenities
+    (r'\b(need|want|must have|prefer).*(wifi|wi-fi|internet)', ('amenity', 'WiFi')),
+    (r'\b(need|want|must have|prefer).*(pool|swimming)', ('amenity', 'Pool')),
+    (r'\b(need|want|must have|prefer).*(gym|fitness)', ('amenity', 'Gym')),
+]
+# Every rule starts with a leading verb alternation such as \b(prefer|like|want|always).
+# Rules are grouped by that prefix so it is searched once per group: a message
+# without the verbs skips the whole group, and otherwise the rules only scan
+# from the first verb onward (no match can start earlier).
+_LEADING_GROUP_RE = re.compile(r"^\\b\([^)]*\)")
+
+
+def _group_preference_patterns(patterns: list) -> list:
+    """Build [(compiled_prefix, [(compiled_rule, (category, value)), ...]), ...] in rule order."""
+    groups: dict = {}
+    for pattern, rule in patterns:
+        prefix = _LEADING_GROUP_RE.match(pattern).group(0)
+        groups.setdefault(prefix, []).append((re.compile(pattern, re.IGNORECASE), rule))
+    return [(re.compile(prefix, re.IGNORECASE), rules) for prefix, rules in groups.items()]
+
+
+_PREFERENCE_RULE_GROUPS = _group_preference_patterns(_PREFERENCE_PATTERNS)
+
+# Words that suggest a preference worth sending to the LLM
+_LLM_TRIGGER_WORDS = ('prefer', 'like', 'always', 'usually', 'typically', 'never', 'hate')
+
+# Remaining substrings a rule prefix may need. A message with none of these and
+# none of the LLM words skips extraction entirely; the LLM words are checked
+# first and the result reused, so each cue is scanned for at most once.
+_RULE_ONLY_TRIGGERS = ('want', 'taking', 'only', 'avoid', 'need', 'must have')
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Memoized extraction: normalized message -> ((category, value, confidence), ...)
+# Only the raw extraction is cached; PreferenceItems are rebuilt per call
+# because merging mutates the caller's preferences. Pattern and LLM results
+# are cached separately so a failed LLM call is retried next time instead of
+# pinning an empty result.
+EXTRACTION_CACHE_MAXSIZE = 512
+
+# With pattern hits present, the LLM is only consulted for messages longer than this
+LLM_EXTRACTION_MIN_CHARS_WITH_HITS = 120
+
+
+@functools.lru_cache(maxsize=EXTRACTION_CACHE_MAXSIZE)
+def _pattern_preference_tuples(message: str) -> tuple:
+    """Run pattern-based extraction (fast path) for a normalized message."""
+    found = []
+    for prefix, rules in _PREFERENCE_RULE_GROUPS:
+        lead = prefix.search(message)
+        if lead is None:
+            continue
+        start = lead.start()
+        for compiled, (category, value) in rules:
+            if compiled.search(message, start):
+                found.append((category, value, 0.9))  # High confidence for pattern matches
+    return tuple(found)
+
+
+# normalized message -> LLM extraction tuples (successful calls only)
+_llm_extraction_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+def _llm_preference_tuples(message: str) -> tuple:
+    """Run LLM extraction for a normalized message, memoizing only successes."""
+    cached = _llm_extraction_cache.get(message)
+    if cached is not None:
+        _llm_extraction_cache.move_to_end(message)
+        return cached
+    
+    items = _extract_preferences_llm(message)
+    if items is None:
+        return ()
+    
+    found = tuple((item.category, item.value, item.confidence) for item in items)
+    _llm_extraction_cache[message] = found
+    if len(_llm_extraction_cache) > EXTRACTION_CACHE_MAXSIZE:
+        _llm_extraction_cache.popitem(last=False)
+    return found
+
+
+def _extract_preference_tuples(message: str, has_llm_cue: bool) -> tuple:
+    """Run pattern + LLM extraction for a normalized message."""
+    found = _pattern_preference_tuples(message)
+    
+    # LLM-based extraction for complex preferences. A confident pattern hit
+    # already covers short messages; only longer ones may hold more to find.
+    if has_llm_cue and (not found or len(message) > LLM_EXTRACTION_MIN_CHARS_WITH_HITS):
+        found += _llm_preference_tuples(message)
+    
+    return found
 
 
 def extract_preferences(message: str, existing_prefs: UserPreferences) -> UserPreferences:
@@ -29,54 +155,26 @@ def extract_preferences(message: str, existing_prefs: UserPreferences) -> UserPr
     Returns:
         Updated preferences
     """
-    message_lower = message.lower()
-    new_items = []
-    
-    # Pattern-based extraction (fast path)
-    patterns = {
-        # Flight time preferences
-        r'\b(prefer|like|want|always|usually|taking).*(morning|early morning|dawn|sunrise).*(flight|flights)': ('flight_time', 'morning'),
-        r'\b(prefer|like|want|always|usually|taking).*(afternoon|midday|lunch).*(flight|flights)': ('flight_time', 'afternoon'),
-        r'\b(prefer|like|want|always|usually|taking).*(evening|night|late|sunset).*(flight|flights)': ('flight_time', 'evening'),
-        
-        # Cabin class preferences
-        r'\b(prefer|like|want|always|usually).*(business class|business)': ('cabin_class', 'business'),
-        r'\b(prefer|like|want|always|usually).*(first class|first)': ('cabin_class', 'first'),
-        r'\b(prefer|like|want|always|usually).*(economy|coach)': ('cabin_class', 'economy'),
-        
-        # Flight preferences
-        r'\b(prefer|like|want|only).*(direct flight|nonstop|no stop)': ('max_stops', '0'),
-        r'\b(don\'t like|hate|avoid|never).*(layover|connection|stop)': ('max_stops', '0'),
-        
-        # Hotel ratings
-        r'\b(prefer|like|want|always).*(4[ -]star|four[ -]star|4\*)': ('min_hotel_rating', '4.0'),
-        r'\b(prefer|like|want|always).*(5[ -]star|five[ -]star|5\*|luxury hotel)': ('min_hotel_rating', '5.0'),
-        r'\b(prefer|like|want|always).*(3[ -]star|three[ -]star|3\*)': ('min_hotel_rating', '3.0'),
-        
-        # Budget preferences
-        r'\b(prefer|like|want|always).*(budget|cheap|affordable|inexpensive)': ('hotel_budget', 'budget'),
-        r'\b(prefer|like|want|always).*(luxury|high[ -]end|expensive|premium)': ('hotel_budget', 'luxury'),
-        
-        # Amenities
-        r'\b(need|want|must have|prefer).*(wifi|wi-fi|internet)': ('amenity', 'WiFi'),
-        r'\b(need|want|must have|prefer).*(pool|swimming)': ('amenity', 'Pool'),
-        r'\b(need|want|must have|prefer).*(gym|fitness)': ('amenity', 'Gym'),
-    }
-    
-    for pattern, (category, value) in patterns.items():
-        if re.search(pattern, message_lower):
-            new_items.append(PreferenceItem(
-                category=category,
-                value=value,
-                confidence=0.9,  # High confidence for pattern matches
-                source_message=message[:100],  # Keep first 100 chars
-                timestamp=time.time()
-            ))
-    
-    # LLM-based extraction for complex preferences
-    if any(word in message_lower for word in ['prefer', 'like', 'always', 'usually', 'typically', 'never', 'hate']):
-        llm_prefs = _extract_preferences_llm(message)
-        new_items.extend(llm_prefs)
+    message_norm = _WHITESPACE_RE.sub(" ", message.lower().strip())
+    
+    # No preference cue at all: skip the regexes and the LLM call
+    has_llm_cue = any(word in message_norm for word in _LLM_TRIGGER_WORDS)
+    if not has_llm_cue and not any(trigger in message_norm for trigger in _RULE_ONLY_TRIGGERS):
+        return merge_preferences(existing_prefs, [])
+    
+    now = time.time()
+    
+    # Values come from our own extraction, so skip re-validation
+    new_items = [
+        PreferenceItem.model_construct(
+            category=category,
+            value=value,
+            confidence=confidence,
+            source_message=message[:100],  # Keep first 100 chars
+            timestamp=now
+        )
+        for category, value, confidence in _extract_preference_tuples(message_norm, has_llm_cue)
+    ]
     
     # Merge new preferences with existing
     updated_prefs = merge_preferences(existing_prefs, new_items)
@@ -84,17 +182,14 @@ def extract_preferences(message: str, existing_prefs: UserPreferences) -> UserPr
     return updated_prefs
 
 
-def _extract_preferences_llm(message: str) -> list[PreferenceItem]:
-    """
-    Use LLM to extract preferences from message.
-    
-    Args:
-        message: User message
-    
-    Returns:
-        List of extracted preference items
-    """
-    system_prompt = """You are a preference extraction assistant. Analyze the user's message and extract any travel preferences mentioned.
+class ExtractedPreference(TypedDict, total=False):
+    """Response schema for one LLM-extracted preference (no defaults: the SDK rejects them)."""
+    category: str
+    value: str
+    confidence: float
+
+
+PREFERENCE_SYSTEM_PROMPT = """You are a preference extraction assistant. Analyze the user's message and extract any travel preferences mentioned.
 Return ONLY a JSON array of preferences with this structure:
 [
   {"category": "flight_time", "value": "morning", "confidence": 0.8},
@@ -106,17 +201,32 @@ Valid values depend on category. Use strings for all values.
 
 If no clear preferences are expressed, return an empty array: []"""
 
+
+def _extract_preferences_llm(message: str) -> Optional[list[PreferenceItem]]:
+    """
+    Use LLM to extract preferences from message.
+    
+    Args:
+        message: User message
+    
+    Returns:
+        List of extracted preference items, or None if the call failed
+    """
     try:
-        response = generate_text(system_prompt, message, temperature=0.3)
+        # Schema-constrained output: Gemini emits a bare JSON array
+        response = generate_text(
+            PREFERENCE_SYSTEM_PROMPT,
+            message,
+            temperature=0.3,
+            response_schema=list[ExtractedPreference]
+        )
+        if response.startswith("Error:"):
+            return None
         
-        # Clean response
-        if "```json" in response:
-            response = response.split("```json")[1].split("```")[0].strip()
-        elif "```" in response:
-            response = response.split("```")[1].split("```")[0].strip()
-        
-        prefs_data = json.loads(response)
+        # Bare JSON, or a fenced block if the schema fell back to plain output
+        prefs_data = parse_json_response(response)
         
+        now = time.time()
         items = []
         for pref in prefs_data:
             items.append(PreferenceItem(
@@ -124,14 +234,14 @@ If no clear preferences are expressed, return an empty array: []"""
                 value=pref.get("value", ""),
                 confidence=pref.get("confidence", 0.7),
                 source_message=message[:100],
-                timestamp=time.time()
+                timestamp=now
             ))
         
         return items
     
     except Exception as e:
-        print(f"Error in LLM preference extraction: {e}")
-        return []
+        logger.warning("Error in LLM preference extraction: %s", e)
+        return None
 
 
 def merge_preferences(existing: UserPreferences, new_items: list[PreferenceItem]) -> UserPreferences:
@@ -145,22 +255,27 @@ def merge_preferences(existing: UserPreferences, new_items: list[PreferenceItem]
     Returns:
         Updated preferences
     """
+    # Flag reflects this turn only, so callers can skip timestamp checks
+    existing.newly_added = bool(new_items)
     if not new_items:
         return existing
     
-    # Update preference items list
-    for item in new_items:
-        existing.preference_items.append(item)
+    # Update preference items list, keeping only the most recent entries
+    existing.preference_items.extend(new_items)
+    if len(existing.preference_items) > MAX_PREFERENCE_ITEMS:
+        del existing.preference_items[:-MAX_PREFERENCE_ITEMS]
     
-    # Apply preferences to top-level fields
+    # Apply preferences to top-level fields (list-valued ones are collected and
+    # deduplicated once below instead of a linear `in` check per item)
+    new_airlines = []
+    new_amenities = []
     for item in new_items:
         if item.category == "flight_time":
             existing.preferred_flight_time = item.value
         elif item.category == "cabin_class":
             existing.preferred_cabin_class = item.value
         elif item.category == "airline":
-            if item.value not in existing.preferred_airlines:
-                existing.preferred_airlines.append(item.value)
+            new_airlines.append(item.value)
         elif item.category == "max_stops":
             existing.max_stops = int(item.value)
         elif item.category == "min_hotel_rating":
@@ -168,11 +283,16 @@ def merge_preferences(existing: UserPreferences, new_items: list[PreferenceItem]
         elif item.category == "hotel_budget":
             existing.preferred_hotel_budget = item.value
         elif item.category == "amenity":
-            if item.value not in existing.preferred_amenities:
-                existing.preferred_amenities.append(item.value)
+            new_amenities.append(item.value)
         elif item.category == "budget_range":
             existing.preferred_budget_range = item.value
     
+    # Ordered dedup via dict keys, keeping first-seen order
+    if new_airlines:
+        existing.preferred_airlines = list(dict.fromkeys(existing.preferred_airlines + new_airlines))
+    if new_amenities:
+        existing.preferred_amenities = list(dict.fromkeys(existing.preferred_amenities + new_amenities))
+    
     existing.last_updated = time.time()
     
     return existing
@@ -198,7 +318,7 @@ def apply_preferences_to_flight_params(
     # Apply cabin class preference if not set
     if params.cabin_class == "economy" and prefs.preferred_cabin_class:
         params.cabin_class = prefs.preferred_cabin_class
-        print(f"[Preferences] Applied cabin class: {prefs.preferred_cabin_class}")
+        logger.debug("[Preferences] Applied cabin class: %s", prefs.preferred_cabin_class)
     
     return params
 
@@ -223,12 +343,12 @@ def apply_preferences_to_hotel_params(
     # Apply minimum rating preference if not set
     if params.min_rating is None and prefs.min_hotel_rating:
         params.min_rating = prefs.min_hotel_rating
-        print(f"[Preferences] Applied min hotel rating: {prefs.min_hotel_rating}")
+        logger.debug("[Preferences] Applied min hotel rating: %s", prefs.min_hotel_rating)
     
     # Apply budget preference if not set
     if params.budget is None and prefs.preferred_hotel_budget:
         params.budget = prefs.preferred_hotel_budget
-        print(f"[Preferences] Applied hotel budget: {prefs.preferred_hotel_budget}")
+        logger.debug("[Preferences] Applied hotel budget: %s", prefs.preferred_hotel_budget)
     
     return params
 
@@ -5,28 +5,73 @@ Handles compression and summarization of conversation history
 to maintain context in long sessions without overwhelming the LLM.
 """
 
+import asyncio
+import logging
 import time
-from typing import List
+from typing import List, Optional, Tuple
+
+import orjson
+
 from ..models import ConversationTurn, ConversationSummary, SharedState
 from ..llm import generate_text
 
+logger = logging.getLogger(__name__)
+
 
 # Configuration
 SUMMARIZATION_THRESHOLD = 10  # Summarize when we have more than this many turns
+SUMMARIZATION_TOKEN_THRESHOLD = 8000  # ...or when the unsummarized history is roughly this many tokens
 KEEP_RECENT_TURNS = 6  # Always keep the last N turns unsummarized
+MAX_CONVERSATION_TURNS = 200  # Hard ring-buffer cap on verbatim turns between compactions
+SUMMARIZATION_BATCH_MAX = 16  # Most compactions folded into one LLM call
+SUMMARIZATION_BATCH_WINDOW_MS = 50  # How long the first queued compaction waits for company
+
+
+def estimate_tokens(turns: List[ConversationTurn]) -> int:
+    """Rough token count for a list of turns (~4 characters per token)."""
+    return sum(len(turn.text) // 4 for turn in turns)
+
+
+def append_turn(state: SharedState, turn: ConversationTurn) -> None:
+    """
+    Append a turn to the conversation history as a bounded ring buffer.
+    
+    Keeps the running token estimate in step and, if compaction has fallen
+    behind, drops the oldest turns beyond MAX_CONVERSATION_TURNS.
+    
+    Args:
+        state: Current shared state
+        turn: Turn to append
+    """
+    history = state.conversation_history
+    history.append(turn)
+    state.approx_tokens += len(turn.text) // 4
+    overflow = len(history) - MAX_CONVERSATION_TURNS
+    if overflow > 0:
+        state.approx_tokens -= estimate_tokens(history[:overflow])
+        del history[:overflow]
 
 
-def should_summarize(history: List[ConversationTurn]) -> bool:
+def should_summarize(history: List[ConversationTurn], approx_tokens: int = 0) -> bool:
     """
     Determine if conversation history should be summarized.
     
     Args:
         history: List of conversation turns
+        approx_tokens: Running token estimate of history (SharedState.approx_tokens)
     
     Returns:
         True if summarization is needed
     """
-    return len(history) > SUMMARIZATION_THRESHOLD
+    return len(history) > SUMMARIZATION_THRESHOLD or approx_tokens > SUMMARIZATION_TOKEN_THRESHOLD
+
+
+def _conversation_text(turns: List[ConversationTurn]) -> str:
+    """Render turns as SENDER: text lines for a summarization prompt."""
+    return "\n".join([
+        f"{turn.sender.upper()}: {turn.text}"
+        for turn in turns
+    ])
 
 
 def summarize_conversation(turns: List[ConversationTurn]) -> str:
@@ -42,12 +87,6 @@ def summarize_conversation(turns: List[ConversationTurn]) -> str:
     if not turns:
         return ""
     
-    # Build conversation text
-    conversation_text = "\n".join([
-        f"{turn.sender.upper()}: {turn.text}"
-        for turn in turns
-    ])
-    
     system_prompt = """You are a conversation summarizer. Create a concise summary of this travel planning conversation that captures:
 1. What the user was searching for (destinations, dates, preferences)
 2. Key results or information provided
@@ -57,17 +96,203 @@ def summarize_conversation(turns: List[ConversationTurn]) -> str:
 Keep the summary brief (2-3 sentences) but informative enough to maintain context.
 Focus on facts, not conversational pleasantries."""
 
-    user_message = f"Summarize this conversation segment:\n\n{conversation_text}"
+    user_message = f"Summarize this conversation segment:\n\n{_conversation_text(turns)}"
     
     try:
         summary = generate_text(system_prompt, user_message, temperature=0.3)
         return summary.strip()
     except Exception as e:
-        print(f"Error summarizing conversation: {e}")
+        logger.warning("Error summarizing conversation: %s", e)
         # Fallback: simple concatenation
         return f"Discussion about travel plans involving {len(turns)} messages."
 
 
+BATCH_SYSTEM_PROMPT = """You are a conversation summarizer. You will be given several independent travel planning conversations, numbered from 1.
+For each one, write a concise summary (2-3 sentences) that captures:
+1. What the user was searching for (destinations, dates, preferences)
+2. Key results or information provided
+3. Any decisions or selections made
+4. Important user preferences mentioned
+
+Focus on facts, not conversational pleasantries.
+Return ONLY a JSON array of strings: one summary per conversation, in the same order."""
+
+
+def summarize_conversations_batch(segments: List[List[ConversationTurn]]) -> List[str]:
+    """
+    Summarize several conversation segments with a single LLM call.
+    
+    Falls back to one call per segment if the batched response is not a
+    JSON array with exactly one string per segment.
+    
+    Args:
+        segments: Conversation segments to summarize, one per compaction
+    
+    Returns:
+        One summary per segment, in order
+    """
+    if len(segments) == 1:
+        return [summarize_conversation(segments[0])]
+    
+    user_message = "\n\n".join(
+        f"Conversation {i}:\n{_conversation_text(turns)}"
+        for i, turns in enumerate(segments, start=1)
+    )
+    
+    try:
+        response = generate_text(
+            BATCH_SYSTEM_PROMPT,
+            user_message,
+            temperature=0.3,
+            response_schema=list[str]
+        )
+        summaries = orjson.loads(response)
+        if (
+            isinstance(summaries, list)
+            and len(summaries) == len(segments)
+            and all(isinstance(summary, str) for summary in summaries)
+        ):
+            return [summary.strip() for summary in summaries]
+        logger.warning("Batched summary had the wrong shape, summarizing %s segments individually", len(segments))
+    except Exception as e:
+        logger.warning("Error in batched summarization, summarizing individually: %s", e)
+    
+    return [summarize_conversation(turns) for turns in segments]
+
+
+class SummarizationBatcher:
+    """
+    Coalesces concurrent compactions into batched summarization calls.
+    
+    The first queued job waits up to SUMMARIZATION_BATCH_WINDOW_MS for others
+    (at most SUMMARIZATION_BATCH_MAX per batch); the batch then goes out as a
+    single LLM call on a worker thread, so the event loop never blocks on it.
+    """
+    
+    def __init__(
+        self,
+        batch_max: int = SUMMARIZATION_BATCH_MAX,
+        window_ms: int = SUMMARIZATION_BATCH_WINDOW_MS
+    ):
+        self._batch_max = batch_max
+        self._window = window_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def summarize(self, turns: List[ConversationTurn]) -> str:
+        """
+        Queue turns for summarization and wait for the result.
+        
+        Args:
+            turns: Conversation turns to summarize
+        
+        Returns:
+            Summary text
+        """
+        loop = asyncio.get_running_loop()
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+        
+        future = loop.create_future()
+        self._queue.put_nowait((turns, future))
+        return await future
+    
+    async def _next_batch(self) -> List[Tuple[List[ConversationTurn], asyncio.Future]]:
+        """Wait for one job, then collect more until the window closes or the batch fills."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self._window
+        
+        try:
+            while len(batch) < self._batch_max:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            _cancel_jobs(batch)
+            raise
+        
+        return batch
+    
+    async def _run(self) -> None:
+        """Worker loop: summarize each batch and resolve its futures by index."""
+        while True:
+            batch = await self._next_batch()
+            segments = [turns for turns, _ in batch]
+            logger.debug("[Summarization] Summarizing batch of %s segments", len(segments))
+            
+            try:
+                summaries = await asyncio.to_thread(summarize_conversations_batch, segments)
+            except asyncio.CancelledError:
+                _cancel_jobs(batch)
+                raise
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), summary in zip(batch, summaries):
+                if not future.done():
+                    future.set_result(summary)
+    
+    async def close(self) -> None:
+        """Stop the worker and cancel queued jobs (called at app shutdown)."""
+        worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
+        
+        if self._queue is not None:
+            queued = []
+            while not self._queue.empty():
+                queued.append(self._queue.get_nowait())
+            _cancel_jobs(queued)
+
+
+def _cancel_jobs(jobs: List[Tuple[List[ConversationTurn], asyncio.Future]]) -> None:
+    """Cancel the futures of jobs that will never be summarized."""
+    for _, future in jobs:
+        if not future.done():
+            future.cancel()
+
+
+summarization_batcher = SummarizationBatcher()
+
+
+def _split_history(state: SharedState) -> Tuple[List[ConversationTurn], List[ConversationTurn]]:
+    """Split history into (old turns to summarize, recent turns to keep)."""
+    history = state.conversation_history
+    turns_to_summarize = history[:-KEEP_RECENT_TURNS] if len(history) > KEEP_RECENT_TURNS else []
+    recent_turns = history[-KEEP_RECENT_TURNS:] if len(history) > KEEP_RECENT_TURNS else history
+    return turns_to_summarize, recent_turns
+
+
+def _apply_summary(state: SharedState, turns_to_summarize: List[ConversationTurn], summary_text: str) -> None:
+    """Record a summary of the oldest turns and drop them from the history."""
+    # Create summary object (all fields computed here, so skip validation)
+    summary = ConversationSummary.model_construct(
+        summary_text=summary_text,
+        turn_count=len(turns_to_summarize),
+        start_timestamp=turns_to_summarize[0].timestamp,
+        end_timestamp=turns_to_summarize[-1].timestamp
+    )
+    
+    # Update state. Slice the live list: turns appended while an async
+    # summary was in flight must survive.
+    state.conversation_summaries.append(summary)
+    state.conversation_history = state.conversation_history[len(turns_to_summarize):]
+    state.approx_tokens = estimate_tokens(state.conversation_history)
+    
+    logger.debug("[Summarization] Created summary: %s...", summary_text[:100])
+
+
 def compress_history(state: SharedState) -> SharedState:
     """
     Compress conversation history by summarizing older turns.
@@ -79,37 +304,47 @@ def compress_history(state: SharedState) -> SharedState:
     Returns:
         Updated state with compressed history
     """
-    history = state.conversation_history
-    
     # Check if summarization is needed
-    if not should_summarize(history):
+    if not should_summarize(state.conversation_history, state.approx_tokens):
         return state
     
-    # Split history: old turns to summarize, recent turns to keep
-    turns_to_summarize = history[:-KEEP_RECENT_TURNS] if len(history) > KEEP_RECENT_TURNS else []
-    recent_turns = history[-KEEP_RECENT_TURNS:] if len(history) > KEEP_RECENT_TURNS else history
-    
+    turns_to_summarize, recent_turns = _split_history(state)
     if not turns_to_summarize:
         return state
     
-    print(f"[Summarization] Compressing {len(turns_to_summarize)} turns, keeping {len(recent_turns)} recent")
+    logger.debug("[Summarization] Compressing %s turns, keeping %s recent", len(turns_to_summarize), len(recent_turns))
     
     # Generate summary
     summary_text = summarize_conversation(turns_to_summarize)
+    _apply_summary(state, turns_to_summarize, summary_text)
     
-    # Create summary object
-    summary = ConversationSummary(
-        summary_text=summary_text,
-        turn_count=len(turns_to_summarize),
-        start_timestamp=turns_to_summarize[0].timestamp,
-        end_timestamp=turns_to_summarize[-1].timestamp
-    )
+    return state
+
+
+async def compress_history_async(state: SharedState) -> SharedState:
+    """
+    Async variant of compress_history for use on the event loop.
     
-    # Update state
-    state.conversation_summaries.append(summary)
-    state.conversation_history = recent_turns
+    The summary comes from the shared SummarizationBatcher, so compactions
+    from concurrent sessions share a single LLM round-trip.
+    
+    Args:
+        state: Current shared state
+    
+    Returns:
+        Updated state with compressed history
+    """
+    if not should_summarize(state.conversation_history, state.approx_tokens):
+        return state
+    
+    turns_to_summarize, recent_turns = _split_history(state)
+    if not turns_to_summarize:
+        return state
+    
+    logger.debug("[Summarization] Compressing %s turns, keeping %s recent", len(turns_to_summarize), len(recent_turns))
     
-    print(f"[Summarization] Created summary: {summary_text[:100]}...")
+    summary_text = await summarization_batcher.summarize(turns_to_summarize)
+    _apply_summary(state, turns_to_summarize, summary_text)
     
     return state
 
@@ -8,14 +8,29 @@ This module provides:
 - Source tracking (live vs mock)
 """
 
+import asyncio
+import functools
+import hashlib
+import inspect
 import json
 import logging
-from typing import Dict, List, Any, Optional
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 
 from pydantic import BaseModel, Field
 
-from .models import FlightSearchParams, HotelSearchParams, FlightResult, HotelResult
+from .models import (
+    FlightSearchParams,
+    HotelSearchParams,
+    FlightResult,
+    HotelResult,
+    FlightResultListAdapter,
+    HotelResultListAdapter,
+)
 from .travel.mock_flights import search_flights, AIRPORT_COORDINATES, calculate_duration
 from .travel.mock_hotels import search_hotels
 from .config import TAVILY_API_KEY
@@ -91,16 +106,14 @@ async def _retry_with_feedback(
                 # Emit retry event if session_id is available
                 if session_id:
                     from .services.event_manager import event_manager
-                    import asyncio
                     await event_manager.emit(session_id, "agent_status", {
                         "agent": "Search Agent",
                         "status": f"Network issue detected. Retrying in {wait_time}s... (attempt {attempt + 2}/{max_retries})",
                         "step": "retry"
                     })
                 
-                import time
                 logger.info(f"Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
+                await asyncio.sleep(wait_time)
             else:
                 logger.info(f"Max retries reached for {operation_name}")
                 return None
@@ -108,6 +121,138 @@ async def _retry_with_feedback(
     return None
 
 
+# ============================================================================
+# Search Result Cache
+# ============================================================================
+
+# Live prices move, so cached searches expire after this many seconds
+TOOL_CACHE_TTL_SECONDS = 600
+
+# sha256(function name + bound arguments) -> (stored_at, result)
+_TOOL_CACHE: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _tool_cache_key(func, args: tuple, kwargs: dict) -> str:
+    """Hash a call's arguments, normalized so positional/keyword/default forms match."""
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    payload = json.dumps([func.__name__, bound.arguments], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _cache_get(key: str, ttl: float) -> Optional[Dict[str, Any]]:
+    """Return a fresh cached result (marked as a hit), dropping it if expired."""
+    with _CACHE_LOCK:
+        entry = _TOOL_CACHE.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > ttl:
+            del _TOOL_CACHE[key]
+            return None
+    return {**result, "cache_hit": True}
+
+
+def _cache_put(key: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Cache a live, non-empty result; mock fallbacks are never cached."""
+    if result.get("source") == "live" and result.get("results"):
+        with _CACHE_LOCK:
+            _TOOL_CACHE[key] = (time.monotonic(), result)
+    return {**result, "cache_hit": False}
+
+
+def memoize(ttl: float = TOOL_CACHE_TTL_SECONDS):
+    """
+    Cache a search function's live results by argument hash for `ttl` seconds.
+    
+    Works for both sync and async functions. Identical repeat searches skip
+    the Tavily round-trip and result formatting; the returned dict carries a
+    `cache_hit` flag.
+    
+    Args:
+        ttl: Seconds a cached result stays fresh
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = _tool_cache_key(func, args, kwargs)
+                cached = _cache_get(key, ttl)
+                if cached is not None:
+                    logger.info(f"{func.__name__}: cache hit")
+                    return cached
+                return _cache_put(key, await func(*args, **kwargs))
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _tool_cache_key(func, args, kwargs)
+            cached = _cache_get(key, ttl)
+            if cached is not None:
+                logger.info(f"{func.__name__}: cache hit")
+                return cached
+            return _cache_put(key, func(*args, **kwargs))
+        return wrapper
+    
+    return decorator
+
+
+# Mock results depend only on the search params, so repeated fallback searches
+# reuse them. Entries expire daily so searches without dates pick up fresh
+# default dates.
+MOCK_CACHE_MAXSIZE = 1024
+MOCK_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# "<search fn>:<params JSON>" -> (stored_at, results), least recently used first
+_MOCK_CACHE: "OrderedDict[str, Tuple[float, list]]" = OrderedDict()
+
+
+def _cached_mock_search(search, params: BaseModel) -> list:
+    """
+    Run a mock search through the in-memory LRU.
+    
+    Args:
+        search: search_flights or search_hotels
+        params: Search parameters passed to it
+    
+    Returns:
+        A fresh list of (shared, never mutated) result models
+    """
+    key = f"{search.__name__}:{params.model_dump_json()}"
+    now = time.monotonic()
+    
+    with _CACHE_LOCK:
+        entry = _MOCK_CACHE.get(key)
+        if entry is not None and now - entry[0] <= MOCK_CACHE_TTL_SECONDS:
+            _MOCK_CACHE.move_to_end(key)
+            return list(entry[1])
+    
+    results = search(params)
+    
+    with _CACHE_LOCK:
+        _MOCK_CACHE[key] = (now, results)
+        _MOCK_CACHE.move_to_end(key)
+        while len(_MOCK_CACHE) > MOCK_CACHE_MAXSIZE:
+            _MOCK_CACHE.popitem(last=False)
+    
+    return list(results)
+
+
+def clear_tool_cache() -> None:
+    """Drop all cached search results (live and mock)."""
+    with _CACHE_LOCK:
+        _TOOL_CACHE.clear()
+        _MOCK_CACHE.clear()
+
+
+def _json_ready(search: Dict[str, Any], adapter) -> Dict[str, Any]:
+    """Dump model results (mock path) to JSON-ready dicts for sync callers."""
+    results = search["results"]
+    if results and not isinstance(results[0], dict):
+        search = {**search, "results": adapter.dump_python(results, mode="json")}
+    return search
+
 
 def lookup_flights(
     origin: str,
@@ -126,6 +271,9 @@ def lookup_flights(
     2. On any error (API limit, timeout, network): fallback to high-quality mock data
     3. Always return results - never crash or say "I don't know"
     
+    Sync shim over lookup_flights_async for callers outside an event loop;
+    must not be called from async code.
+    
     Args:
         origin: Origin airport/city
         destination: Destination airport/city
@@ -137,9 +285,80 @@ def lookup_flights(
     Returns:
         Dict with 'results' (list of flights), 'source' ('live' or 'mock'), and 'summary'
     """
-    logger.info(f"Flight search: {origin} → {destination}")
+    search = asyncio.run(lookup_flights_async(
+        origin=origin,
+        destination=destination,
+        depart_date=depart_date,
+        return_date=return_date,
+        passengers=passengers,
+        cabin_class=cabin_class,
+        max_stops=max_stops
+    ))
+    return _json_ready(search, FlightResultListAdapter)
+
+
+def lookup_hotels(
+    city: str,
+    check_in: Optional[str] = None,
+    check_out: Optional[str] = None,
+    guests: int = 1,
+    budget: Optional[str] = None,
+    min_rating: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Search for hotels using Tavily API with fallback to mock data.
+    
+    Sync shim over lookup_hotels_async for callers outside an event loop;
+    must not be called from async code.
+    
+    Args:
+        city: City to search in
+        check_in: Check-in date
+        check_out: Check-out date
+        guests: Number of guests
+        budget: Budget preference
+        min_rating: Minimum star rating
+        
+    Returns:
+        Dict with 'results', 'source', and 'summary'
+    """
+    search = asyncio.run(lookup_hotels_async(
+        city=city,
+        check_in=check_in,
+        check_out=check_out,
+        guests=guests,
+        budget=budget,
+        min_rating=min_rating
+    ))
+    return _json_ready(search, HotelResultListAdapter)
+
+
+# ============================================================================
+# Async Search Tools (awaited directly from graph nodes)
+# ============================================================================
+
+@memoize()
+async def lookup_flights_async(
+    origin: str,
+    destination: str,
+    depart_date: Optional[str] = None,
+    return_date: Optional[str] = None,
+    passengers: int = 1,
+    cabin_class: str = "economy",
+    max_stops: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Async variant of lookup_flights.
+    
+    Uses Tavily's native async invoke and asyncio.sleep for backoff so the
+    search never blocks the event loop or needs a worker thread.
+    
+    Returns:
+        Same shape as lookup_flights, except mock results stay FlightResult
+        models (the graph stores them as-is instead of re-validating dicts)
+    """
+    logger.info(f"Flight search (async): {origin} → {destination}")
     
-    # Construct search query for Tavily
     query_parts = [
         f"flights from {origin} to {destination}",
         f"{cabin_class} class" if cabin_class != "economy" else "",
@@ -148,7 +367,6 @@ def lookup_flights(
     ]
     search_query = " ".join([p for p in query_parts if p]).strip()
     
-    # Attempt Tavily search with retry logic
     if tavily_search:
         max_retries = 3
         retry_delay = 1  # seconds
@@ -156,15 +374,12 @@ def lookup_flights(
         for attempt in range(max_retries):
             try:
                 logger.info(f"Attempting Tavily search (attempt {attempt + 1}/{max_retries}): {search_query}")
-                
-                # Execute search
-                search_results = tavily_search.invoke({"query": search_query})
+                search_results = await tavily_search.ainvoke({"query": search_query})
                 
                 if search_results and len(search_results) > 0:
-                    # Format Tavily results
                     formatted_results = _format_tavily_flight_results(
-                        search_results, 
-                        origin, 
+                        search_results,
+                        origin,
                         destination,
                         cabin_class,
                         depart_date
@@ -176,26 +391,24 @@ def lookup_flights(
                             "results": formatted_results,
                             "source": "live",
                             "summary": f"Found {len(formatted_results)} live flight options from web search",
-                            "raw_snippets": search_results[:3]  # Include snippets for LLM context
+                            "raw_snippets": search_results[:3]
                         }
                 
                 logger.warning("Tavily returned no usable results")
-                break  # Don't retry if we got a response but no results
+                break
             
             except Exception as e:
                 error_type = type(e).__name__
                 logger.error(f"Tavily search failed (attempt {attempt + 1}/{max_retries}): {error_type}: {str(e)}")
                 
-                # Check if we should retry
                 if attempt < max_retries - 1:
-                    import time
                     wait_time = retry_delay * (2 ** attempt)  # Exponential backoff
                     logger.info(f"Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
+                    await asyncio.sleep(wait_time)
                 else:
                     logger.info("Max retries reached, falling back to mock data")
     
-    # Fallback to mock data
+    # Fallback to mock data (pure CPU, no I/O)
     params = FlightSearchParams(
         origin=origin,
         destination=destination,
@@ -206,17 +419,18 @@ def lookup_flights(
         max_stops=max_stops
     )
     
-    mock_results = search_flights(params)
+    mock_results = _cached_mock_search(search_flights, params)
     
     return {
-        "results": [f.dict() for f in mock_results],
+        "results": mock_results,
         "source": "mock",
         "summary": f"Found {len(mock_results)} flight options (simulated data)",
         "note": "Using simulated data - live search unavailable"
     }
 
 
-def lookup_hotels(
+@memoize()
+async def lookup_hotels_async(
     city: str,
     check_in: Optional[str] = None,
     check_out: Optional[str] = None,
@@ -225,22 +439,13 @@ def lookup_hotels(
     min_rating: Optional[float] = None
 ) -> Dict[str, Any]:
     """
-    Search for hotels using Tavily API with fallback to mock data.
+    Async variant of lookup_hotels.
     
-    Args:
-        city: City to search in
-        check_in: Check-in date
-        check_out: Check-out date
-        guests: Number of guests
-        budget: Budget preference
-        min_rating: Minimum star rating
-        
     Returns:
-        Dict with 'results', 'source', and 'summary'
+        Same shape as lookup_hotels, except mock results stay HotelResult models
     """
-    logger.info(f"Hotel search: {city}")
+    logger.info(f"Hotel search (async): {city}")
     
-    # Construct search query
     query_parts = [
         f"hotels in {city}",
         f"check-in {check_in}" if check_in else "",
@@ -251,7 +456,6 @@ def lookup_hotels(
     ]
     search_query = " ".join([p for p in query_parts if p]).strip()
     
-    # Attempt Tavily search with retry logic
     if tavily_search:
         max_retries = 3
         retry_delay = 1  # seconds
@@ -259,7 +463,7 @@ def lookup_hotels(
         for attempt in range(max_retries):
             try:
                 logger.info(f"Attempting Tavily search (attempt {attempt + 1}/{max_retries}): {search_query}")
-                search_results = tavily_search.invoke({"query": search_query})
+                search_results = await tavily_search.ainvoke({"query": search_query})
                 
                 if search_results and len(search_results) > 0:
                     formatted_results = _format_tavily_hotel_results(search_results, city, budget)
@@ -274,22 +478,20 @@ def lookup_hotels(
                         }
                 
                 logger.warning("Tavily returned no usable results")
-                break  # Don't retry if we got a response but no results
+                break
             
             except Exception as e:
                 error_type = type(e).__name__
                 logger.error(f"Tavily search failed (attempt {attempt + 1}/{max_retries}): {error_type}: {str(e)}")
                 
-                # Check if we should retry
                 if attempt < max_retries - 1:
-                    import time
                     wait_time = retry_delay * (2 ** attempt)  # Exponential backoff
                     logger.info(f"Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
+                    await asyncio.sleep(wait_time)
                 else:
                     logger.info("Max retries reached, falling back to mock data")
     
-    # Fallback to mock data
+    # Fallback to mock data (pure CPU, no I/O)
     params = HotelSearchParams(
         city=city,
         check_in=check_in,
@@ -299,16 +501,56 @@ def lookup_hotels(
         min_rating=min_rating
     )
     
-    mock_results = search_hotels(params)
+    mock_results = _cached_mock_search(search_hotels, params)
     
     return {
-        "results": [h.dict() for h in mock_results],
+        "results": mock_results,
         "source": "mock",
         "summary": f"Found {len(mock_results)} hotel options (simulated data)",
         "note": "Using simulated data - live search unavailable"
     }
 
 
+async def combined_search(
+    flight_kwargs: Dict[str, Any],
+    hotel_kwargs: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Run a flight and a hotel search concurrently.
+    
+    Total latency is the slower of the two searches rather than their sum.
+    A search that raises is logged and replaced by an empty result, so it
+    never discards the other search's results.
+    
+    Args:
+        flight_kwargs: Keyword arguments for lookup_flights_async
+        hotel_kwargs: Keyword arguments for lookup_hotels_async
+    
+    Returns:
+        (flight_result, hotel_result), each shaped like lookup_flights/lookup_hotels
+    """
+    outcomes = await asyncio.gather(
+        lookup_flights_async(**flight_kwargs),
+        lookup_hotels_async(**hotel_kwargs),
+        return_exceptions=True
+    )
+    
+    results = []
+    for label, outcome in zip(("Flight", "Hotel"), outcomes):
+        if isinstance(outcome, BaseException):
+            if isinstance(outcome, asyncio.CancelledError):
+                raise outcome
+            logger.error(f"{label} search failed in combined search: {type(outcome).__name__}: {outcome}")
+            outcome = {
+                "results": [],
+                "source": "error",
+                "summary": f"{label} search failed"
+            }
+        results.append(outcome)
+    
+    return results[0], results[1]
+
+
 # ============================================================================
 # Tavily Result Formatting
 # ============================================================================
@@ -349,10 +591,11 @@ def _format_tavily_flight_results(
     for idx, result in enumerate(search_results[:5]):  # Top 5 results
         try:
             content = result.get("content", "")
+            content_lc = content.lower()  # Lowercased once for the airline and stops checks
             url = result.get("url", "")
             
             # Extract airline or use default from cycle
-            airline = _extract_airline(content)
+            airline = _extract_airline(content_lc)
             if airline == "Major Airline":
                 airline = default_airlines[idx % len(default_airlines)]
             
@@ -368,11 +611,11 @@ def _format_tavily_flight_results(
             # In production, you'd use more sophisticated NLP or structured data
             # Extract stops from content
             stops = 0
-            if "1 stop" in content.lower():
+            if "1 stop" in content_lc:
                 stops = 1
-            elif "2 stops" in content.lower():
+            elif "2 stops" in content_lc:
                 stops = 2
-            elif "non-stop" in content.lower() or "direct" in content.lower():
+            elif "non-stop" in content_lc or "direct" in content_lc:
                 stops = 0
             
             flight_data = {
@@ -419,14 +662,15 @@ def _format_tavily_hotel_results(
     for idx, result in enumerate(search_results[:5]):
         try:
             content = result.get("content", "")
+            content_lc = content.lower()
             url = result.get("url", "")
             
             hotel_data = {
                 "id": f"live_hotel_{idx}",
-                "name": _extract_hotel_name(content),
+                "name": _extract_hotel_name(content_lc),
                 "city": city,
                 "address": None,
-                "star_rating": _extract_rating(content),
+                "star_rating": _extract_rating(content_lc),
                 "review_score": None,
                 "price_per_night": _extract_price(content),
                 "currency": "USD",
@@ -451,46 +695,53 @@ def _format_tavily_hotel_results(
 # Helper Functions for Parsing
 # ============================================================================
 
-def _extract_airline(text: str) -> str:
-    """Extract airline name from text."""
-    airlines = ["United", "Delta", "American", "Southwest", "JetBlue", "Alaska", "Spirit", "Frontier"]
-    for airline in airlines:
-        if airline.lower() in text.lower():
-            return f"{airline} Airlines"
+# Candidate names, lowercased once at import
+_AIRLINES = ["United", "Delta", "American", "Southwest", "JetBlue", "Alaska", "Spirit", "Frontier"]
+_AIRLINES_LC = [(airline.lower(), f"{airline} Airlines") for airline in _AIRLINES]
+
+_HOTEL_CHAINS = ["Hilton", "Marriott", "Hyatt", "Holiday Inn", "Best Western", "Sheraton"]
+_HOTEL_CHAINS_LC = [(chain.lower(), f"{chain} Hotel") for chain in _HOTEL_CHAINS]
+
+# Patterns like $299, $1,299.99
+_PRICE_RE = re.compile(r'\$[\d,]+\.?\d*')
+# Patterns like "4.5 stars", "3-star"
+_RATING_RE = re.compile(r'(\d+\.?\d*)[- ]star')
+
+
+def _extract_airline(text_lc: str) -> str:
+    """Extract airline name from already-lowercased text."""
+    for airline_lc, name in _AIRLINES_LC:
+        if airline_lc in text_lc:
+            return name
     return "Major Airline"
 
 
-def _extract_hotel_name(text: str) -> str:
-    """Extract hotel name from text."""
-    chains = ["Hilton", "Marriott", "Hyatt", "Holiday Inn", "Best Western", "Sheraton"]
-    for chain in chains:
-        if chain.lower() in text.lower():
-            return f"{chain} Hotel"
+def _extract_hotel_name(text_lc: str) -> str:
+    """Extract hotel name from already-lowercased text."""
+    for chain_lc, name in _HOTEL_CHAINS_LC:
+        if chain_lc in text_lc:
+            return name
     return "Quality Hotel"
 
 
 def _extract_price(text: str) -> float:
     """Extract price from text (basic regex)."""
-    import re
-    # Look for patterns like $299, $1,299.99, etc.
-    matches = re.findall(r'\$[\d,]+\.?\d*', text)
-    if matches:
+    match = _PRICE_RE.search(text)
+    if match:
         try:
-            price_str = matches[0].replace('$', '').replace(',', '')
+            price_str = match.group(0).replace('$', '').replace(',', '')
             return float(price_str)
         except:
             pass
     return 299.99  # Default
 
 
-def _extract_rating(text: str) -> float:
-    """Extract star rating from text."""
-    import re
-    # Look for patterns like "4.5 stars", "3-star"
-    matches = re.findall(r'(\d+\.?\d*)[- ]star', text.lower())
-    if matches:
+def _extract_rating(text_lc: str) -> float:
+    """Extract star rating from already-lowercased text."""
+    match = _RATING_RE.search(text_lc)
+    if match:
         try:
-            return float(matches[0])
+            return float(match.group(1))
         except:
             pass
 
@@ -554,7 +805,7 @@ def lookup_hotels_visual(
                     # Parse content for price/rating
                     content = res.get("content", "")
                     price = _extract_price(content)
-                    rating = _extract_rating(content)
+                    rating = _extract_rating(content.lower())
                     
                     # Use a random image from the response images if available, else placeholder
                     img = "https://images.unsplash.com/photo-1566073771259-6a8506099945?auto=format&fit=crop&w=800&q=80"
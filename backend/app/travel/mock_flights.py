@@ -5,12 +5,15 @@ Generates realistic flight data for testing and demos without external API calls
 Returns randomized but consistent flight options including multi-leg itineraries.
 """
 
+import logging
 import random
 from datetime import datetime, timedelta
 from typing import List, Optional
 
 from ..models import FlightResult, FlightSearchParams, FlightSegment
 
+logger = logging.getLogger(__name__)
+
 
 # Mock airline data
 AIRLINES = [
@@ -279,7 +282,7 @@ def search_flights(params: Optional[FlightSearchParams] = None) -> List[FlightRe
     num_flights = random.randint(5, 10)
     flights = []
     
-    print(f"[Flight Search] Generating {num_flights} flights from {origin} to {destination}, max_stops filter: {params.max_stops if params and params.max_stops is not None else 'None (all)'}")
+    logger.debug("[Flight Search] Generating %s flights from %s to %s, max_stops filter: %s", num_flights, origin, destination, params.max_stops if params and params.max_stops is not None else 'None (all)')
     
     base_duration = calculate_duration(origin, destination)
     
@@ -300,14 +303,14 @@ def search_flights(params: Optional[FlightSearchParams] = None) -> List[FlightRe
         else:
             stops = 2
             
-        print(f"[Flight Search] Flight {i}: Initial stops={stops}")
+        logger.debug("[Flight Search] Flight %s: Initial stops=%s", i, stops)
 
         # Override if max_stops is set and lower than generated
         if params.max_stops is not None and stops > params.max_stops:
-             print(f"[Flight Search] Flight {i}: Reducing stops from {stops} to max {params.max_stops}")
+             logger.debug("[Flight Search] Flight %s: Reducing stops from %s to max %s", i, stops, params.max_stops)
              stops = random.randint(0, params.max_stops)
         
-        print(f"[Flight Search] Flight {i}: Final stops={stops}")
+        logger.debug("[Flight Search] Flight %s: Final stops=%s", i, stops)
         
         # Random departure time (spread throughout the day)
         
@@ -358,12 +361,12 @@ def search_flights(params: Optional[FlightSearchParams] = None) -> List[FlightRe
         
         flights.append(flight)
     
-    print(f"[Flight Search] Generated {len(flights)} flights before filtering")
+    logger.debug("[Flight Search] Generated %s flights before filtering", len(flights))
     
     # Filter by max_stops if specified
     if params.max_stops is not None:
         flights = [f for f in flights if f.stops <= params.max_stops]
-        print(f"[Flight Search] After max_stops filter ({params.max_stops}): {len(flights)} flights remaining")
+        logger.debug("[Flight Search] After max_stops filter (%s): %s flights remaining", params.max_stops, len(flights))
     
     # Sort by price (cheapest first)
     flights.sort(key=lambda f: f.price)
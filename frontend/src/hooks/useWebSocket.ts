@@ -1,5 +1,5 @@
 import { useEffect, useRef, useState } from 'react';
-import type { WebSocketEvent } from '../types';
+import type { WebSocketEvent, WebSocketFrame } from '../types';
 
 export function useWebSocket(sessionId: string, onMessage: (event: WebSocketEvent) => void) {
   const [connected, setConnected] = useState(false);
@@ -19,9 +19,14 @@ export function useWebSocket(sessionId: string, onMessage: (event: WebSocketEven
 
     ws.current.onmessage = (event) => {
       try {
-        const data: WebSocketEvent = JSON.parse(event.data);
+        const data: WebSocketFrame = JSON.parse(event.data);
         console.log('WebSocket message:', data);
-        onMessage(data);
+        if (data.type === 'batch') {
+          // Dispatch batched events in order, as if they arrived separately
+          data.events.forEach(onMessage);
+        } else {
+          onMessage(data);
+        }
       } catch (error) {
         console.error('Failed to parse WebSocket message:', error);
       }
@@ -106,3 +106,8 @@ export type WebSocketEvent =
   | { type: 'preference_update'; preference: { category: string; value: string }; session_id: string }
   | { type: 'preferences_cleared'; session_id: string }
   | { type: 'echo'; data: string };
+
+// Wire-level frame: the server coalesces end-of-run events into one batch
+export type WebSocketFrame =
+  | WebSocketEvent
+  | { type: 'batch'; events: WebSocketEvent[]; session_id: string };